@@ -14,6 +14,7 @@ class HopfieldApp:
         self.grid = np.zeros((grid_size, grid_size), np.int32)
         self.current_pattern_index = 0
         self.network = hf.HopfieldNetwork(grid_size, 5)
+        self.network.recovery_hook = self.show_statistics
         self.create_widgets()
 
     def create_widgets(self):
@@ -54,6 +55,9 @@ class HopfieldApp:
         self.load_network_button = tk.Button(buttons_frame, text="Load Network", command=self.load_network)
         self.load_network_button.pack(fill=tk.X, padx=5, pady=5)
 
+        self.statistics_label = tk.Label(buttons_frame, justify=tk.LEFT)
+        self.statistics_label.pack(fill=tk.X, padx=5, pady=5)
+
     def toggle_cell(self, event, i, j):
         if self.grid[i][j] == 0:
             self.grid[i][j] = 1
@@ -98,9 +102,11 @@ class HopfieldApp:
         self.update_grid_with_pattern(self.network.patterns[self.current_pattern_index])
 
     def update_grid_with_pattern(self, pattern : hf.Pattern):
+        picture_matrix = pattern.picture_matrix
+
         for i in range(self.grid_size):
             for j in range(self.grid_size):
-                if pattern.picture_matrix[i][j] == 1:
+                if picture_matrix[i][j] == 1:
                     self.grid[i][j] = 1
                     self.canvas.itemconfig(self.canvas.find_all()[i * self.grid_size + j], fill='black')
                 else:
@@ -125,16 +131,21 @@ class HopfieldApp:
         else:
             self.update_grid_with_pattern(result)
 
+    def show_statistics(self, statistics : hf.RecoveryStatistics):
+        self.statistics_label.config(text="{}\n{:.2f} ms\nsweeps: {}\nflips: {}\nenergy: {:.1f} -> {:.1f}".format(
+            statistics.mode, statistics.latency * 1000.0, statistics.sweeps, statistics.flips, statistics.energies[0], statistics.energies[-1]))
+
     def save_network(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".pickle", filetypes=[("Pickle files", "*.pickle")])
+        filename = filedialog.asksaveasfilename(defaultextension=".hopfield", filetypes=[("Hopfield networks", "*.hopfield")])
         if filename:
             self.network.save_network(filename)
 
 
     def load_network(self):
-        filename = filedialog.askopenfilename(filetypes=[("Pickle files", "*.pickle")])
+        filename = filedialog.askopenfilename(filetypes=[("Hopfield networks", "*.hopfield"), ("Pickle files", "*.pickle")])
         if filename:
             self.network = hf.HopfieldNetwork.load_network(filename)
+            self.network.recovery_hook = self.show_statistics
             self.current_pattern_index = 0
             self.clear_grid()
 
@@ -0,0 +1,128 @@
+import argparse
+import json
+import platform
+import time
+import numpy as np
+
+import hopfield as hf
+
+# Meranie obnovy vzorov bez GUI. Pre kazdu kombinaciu velkosti mriezky, poctu ulozenych vzorov
+# a sumu (podiel preklopenych bitov sondy) sa zmeria cas, pocet prechodov a preklopeni, energia
+# a presnost obnovy pre synchronnu, asynchronnu a davkovu obnovu. Statistiky zbiera
+# HopfieldNetwork.recovery_hook, takze sa meria presne to, co vidi aj aplikacia.
+#   python benchmark.py --sizes 5 16 64 128 --patterns 1 5 10 --noise 0.05 0.2 --output results.json
+
+MODES = ("synchronous", "asynchronous", "batch")
+
+def random_patterns(rng, grid_size : int, count : int) -> list[hf.Pattern]:
+    return [hf.Pattern(rng.integers(0, 2, (grid_size, grid_size))) for _ in range(count)]
+
+def noisy_probe(rng, pattern : hf.Pattern, noise : float) -> np.ndarray:
+    vector = pattern.column_vector.copy()
+    flipped = rng.choice(vector.size, int(round(noise * vector.size)), replace=False)
+    vector[flipped] = -vector[flipped]
+
+    return vector
+
+def vector_pattern(vector, grid_size : int) -> hf.Pattern:
+    return hf.Pattern(np.where(vector > 0, 1, 0).reshape((grid_size, grid_size)))
+
+def build_network(rng, grid_size : int, count : int, triangular : bool):
+    network = hf.HopfieldNetwork(grid_size, 5, triangular)
+    patterns = random_patterns(rng, grid_size, count)
+
+    # nahodne vzory sa mozu zopakovat (hlavne pri malej mriezke), ulozia sa len raz
+    patterns = [pattern for pattern in patterns if network.add_pattern(pattern)]
+
+    return network, patterns
+
+def run_case(grid_size : int, count : int, noise : float, probes : int, seed : int, triangular : bool) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    network, patterns = build_network(rng, grid_size, count, triangular)
+
+    targets = rng.integers(0, len(patterns), probes)
+    vectors = np.array([noisy_probe(rng, patterns[target], noise) for target in targets])
+
+    collected = []
+    network.recovery_hook = collected.append
+
+    results = []
+    for mode in MODES:
+        collected.clear()
+
+        if mode == "batch":
+            network.batch_recovery(vectors)
+            statistics = collected[0]
+
+            latency = [statistics.latency / probes] * probes
+            sweeps, flips = statistics.sweeps, statistics.flips
+            matches = statistics.pattern_index
+            energies = np.array(statistics.energies).T.tolist()
+        else:
+            for vector in vectors:
+                if mode == "synchronous":
+                    network.synchronous_recovery(vector_pattern(vector, grid_size))
+                else:
+                    network.asynchronous_recovery(vector_pattern(vector, grid_size))
+
+            latency = [statistics.latency for statistics in collected]
+            sweeps = [statistics.sweeps for statistics in collected]
+            flips = [statistics.flips for statistics in collected]
+            matches = np.array([statistics.pattern_index for statistics in collected])
+            energies = [statistics.energies for statistics in collected]
+
+        results.append({
+            "mode" : mode,
+            "grid_size" : grid_size,
+            "patterns" : len(patterns),
+            "noise" : noise,
+            "probes" : probes,
+            "triangular" : triangular,
+            "latency_ms" : round(float(np.mean(latency)) * 1000.0, 4),
+            "sweeps" : float(np.mean(sweeps)),
+            "flips" : float(np.mean(flips)),
+            # obnoveny presne ten vzor, z ktoreho vznikla sonda
+            "accuracy" : float(np.mean(matches == targets)),
+            "spurious" : float(np.mean(matches < 0)),
+            "energies" : energies
+        })
+
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hopfield network recall benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 8, 16, 32, 64, 128])
+    parser.add_argument("--patterns", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.0, 0.05, 0.1, 0.2, 0.3])
+    parser.add_argument("--probes", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    # od tejto velkosti mriezky sa vahy ukladaju len ako horny trojuholnik
+    parser.add_argument("--triangular-from", type=int, default=64)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    results = []
+    for grid_size in args.sizes:
+        for count in args.patterns:
+            for noise in args.noise:
+                start = time.perf_counter()
+                cases = run_case(grid_size, count, noise, args.probes, args.seed, grid_size >= args.triangular_from)
+
+                for case in cases:
+                    print("{:>12} {:>4} {:>3} {:>5} {:>10.3f} ms  sweeps {:>6.2f}  flips {:>9.1f}  accuracy {:.2f}".format(
+                        case["mode"], case["grid_size"], case["patterns"], case["noise"], case["latency_ms"], case["sweeps"], case["flips"], case["accuracy"]))
+                results.extend(cases)
+
+                print("  case took {:.2f} s".format(time.perf_counter() - start))
+
+    if args.output:
+        report = {
+            "machine" : {"platform" : platform.platform(), "processor" : platform.processor(), "python" : platform.python_version(), "numpy" : np.__version__},
+            "results" : results
+        }
+
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
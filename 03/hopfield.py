@@ -1,93 +1,474 @@
 import numpy as np
-from copy import deepcopy
+import json
+import os
 import pickle
+import struct
+import time
 
+# Vzor sa uklada ako bitovo zbaleny vektor (1 bit na neuron). Matica vah vzoru (D x D)
+# sa pocita az pri pristupe a neuklada sa.
 class Pattern:
     def __init__(self, picture_matrix) -> None:
-        self.picture_matrix = picture_matrix
-        self.column_vector = np.where(picture_matrix == 0, -1, picture_matrix).flatten()
-        self.transposed_column_vector = self.column_vector.reshape(-1, 1)
-        self.weight_matrix = np.outer(self.column_vector, self.transposed_column_vector) - np.identity(len(self.column_vector)).astype(np.int32)
-    
+        picture_matrix = np.asarray(picture_matrix)
+
+        self.shape = picture_matrix.shape
+        self.packed_bits = np.packbits(picture_matrix.flatten() > 0)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def picture_matrix(self):
+        return np.unpackbits(self.packed_bits, count=self.size).reshape(self.shape).astype(np.int32)
+
+    @property
+    def column_vector(self):
+        return np.unpackbits(self.packed_bits, count=self.size).astype(np.int8) * 2 - 1
+
+    @property
+    def transposed_column_vector(self):
+        return self.column_vector.reshape(-1, 1)
+
+    @property
+    def weight_matrix(self):
+        vector = self.column_vector.astype(np.int32)
+
+        return np.outer(vector, vector) - np.identity(len(vector), dtype=np.int32)
+
+    @staticmethod
+    def from_packed(packed_bits, shape : tuple) -> "Pattern":
+        pattern = Pattern.__new__(Pattern)
+        pattern.shape = tuple(shape)
+        pattern.packed_bits = np.array(packed_bits, dtype=np.uint8)
+
+        return pattern
+
+    # vzory ulozene starsou verziou (pickle s plnymi maticami) sa prevedu na zbalene bity
+    def __setstate__(self, state : dict) -> None:
+        if "packed_bits" in state:
+            self.__dict__.update(state)
+        else:
+            self.__init__(state["picture_matrix"])
+
+# Binarny format siete: MAGIC, verzia a dlzka hlavicky (FILE_HEADER), hlavicka v JSON,
+# potom surove polia vah a zbalenych vzorov zarovnane na ALIGNMENT bajtov, aby sa vahy
+# dali pri nacitani namapovat do pamate (np.memmap) bez citania celeho suboru.
+MAGIC = b"HOPF"
+VERSION = 1
+FILE_HEADER = struct.Struct("<HI")
+ALIGNMENT = 64
+
+def vector_key(vector) -> bytes:
+    return np.packbits(np.asarray(vector).flatten() > 0).tobytes()
+
+# najmensi celociselny typ, do ktoreho sa zmesti sucet count vzorov (|w| <= count)
+def weights_dtype(count : int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if count <= np.iinfo(dtype).max:
+            return dtype
+
+    return np.int64
+
+# energia E = -1/2 s . h pre stavy s a ich lokalne polia h = s W (aj pre pole N x D)
+def energy(states, fields):
+    return -0.5 * np.sum(np.asarray(states, dtype=np.float64) * fields, axis=-1)
+
+# Statistiky jedneho volania obnovy, odovzdane do HopfieldNetwork.recovery_hook.
+# sweeps = pocet prechodov (iteracii) so zmenou, flips = pocet preklopenych neuronov,
+# energies = energia vstupu a potom stavu po kazdom prechode, pattern_index = zhodny vzor (-1 = ziadny).
+# Pri batch_recovery su sweeps, flips, converged a pattern_index polia po riadkoch a energies zoznam poli.
+class RecoveryStatistics:
+    def __init__(self, mode : str) -> None:
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.latency = 0.0
+        self.sweeps = 0
+        self.flips = 0
+        self.energies = []
+        self.converged = False
+        self.pattern_index = -1
+
+    def stop(self) -> None:
+        self.latency = time.perf_counter() - self.start
+
+    def as_dict(self) -> dict:
+        def plain(value):
+            return value.tolist() if isinstance(value, np.ndarray) else value
+
+        return {
+            "mode" : self.mode,
+            "latency" : self.latency,
+            "sweeps" : plain(self.sweeps),
+            "flips" : plain(self.flips),
+            "energies" : [plain(value) for value in self.energies],
+            "converged" : plain(self.converged),
+            "pattern_index" : plain(self.pattern_index)
+        }
+
 class HopfieldNetwork:
-    def __init__(self, grid_size : int, stable_iterations : int) -> None:
-        self.weights_matrix = np.zeros((grid_size **2, grid_size **2), np.int32)
+    triangular = False
+    weights_triangle = None
+    # volane s RecoveryStatistics po kazdej obnove; ak je None, statistiky sa nezbieraju
+    recovery_hook = None
+
+    # triangular=True uklada len horny trojuholnik symetrickej matice vah (D * (D - 1) / 2 cisel)
+    # stable_iterations sa uz nepouziva a zostava len kvoli kompatibilite volani a ulozenych suborov:
+    # asynchronous_recovery konci po prvom prechode bez zmeny (dalsie prechody by uz nic nezmenili),
+    # pocet prechodov obmedzuje jej argument max_sweeps
+    def __init__(self, grid_size : int, stable_iterations : int, triangular : bool = False) -> None:
+        size = grid_size ** 2
+
         self.grid_size = grid_size
         self.patterns = []
+        # zbalene bity vzoru -> index v self.patterns
+        self.pattern_index = {}
         self.stable_iterations = stable_iterations
+        self.triangular = triangular
+
+        if triangular:
+            self.weights_matrix = None
+            self.weights_triangle = np.zeros(size * (size - 1) // 2, np.int8)
+        else:
+            self.weights_matrix = np.zeros((size, size), np.int8)
+
+    # siete ulozene starsou verziou nemaju index vzorov
+    def __setstate__(self, state : dict) -> None:
+        self.__dict__.update(state)
+
+        if "pattern_index" not in state:
+            self.rebuild_index()
+
+    def rebuild_index(self) -> None:
+        self.pattern_index = {pattern.packed_bits.tobytes() : index for index, pattern in enumerate(self.patterns)}
+
+    # zaciatok riadku i v hornom trojuholniku (prvky W[i, i + 1:])
+    def triangle_offset(self, row):
+        size = self.grid_size ** 2
+
+        return row * size - row * (row + 1) // 2
+
+    def weight_rows(self, start : int, stop : int):
+        if not self.triangular:
+            return self.weights_matrix[start:stop]
+
+        size = self.grid_size ** 2
+        rows = np.zeros((stop - start, size), self.weights_triangle.dtype)
+
+        for row in range(start, stop):
+            offset = self.triangle_offset(row)
+            rows[row - start, row + 1:] = self.weights_triangle[offset:offset + size - row - 1]
+
+            columns = np.arange(row)
+            rows[row - start, :row] = self.weights_triangle[self.triangle_offset(columns) + row - columns - 1]
+
+        return rows
+
+    # lokalne polia states @ W pre pole stavov (N x D) po blokoch riadkov, aby sa na float64
+    # prevadzal len jeden blok vah naraz a nie cela D x D matica
+    def local_fields(self, states, block_size : int = 512):
+        states = np.asarray(states, dtype=np.float64)
+
+        size = self.grid_size ** 2
+        fields = np.zeros(states.shape[:-1] + (size,))
+        for start in range(0, size, block_size):
+            stop = min(start + block_size, size)
+            fields += np.dot(states[..., start:stop], self.weight_rows(start, stop).astype(np.float64))
+
+        return fields
+
+    # pricita (sign = 1) alebo odcita (sign = -1) vonkajsi sucin vzoru bez alokacie D x D matice
+    def update_weights(self, pattern : Pattern, sign : int, block_size : int = 512) -> None:
+        dtype = weights_dtype(len(self.patterns) + 1)
+        vector = pattern.column_vector * sign
+        size = len(vector)
+
+        if self.triangular:
+            self.weights_triangle = self.weights_triangle.astype(dtype, copy=False)
+
+            for row in range(size - 1):
+                offset = self.triangle_offset(row)
+                self.weights_triangle[offset:offset + size - row - 1] += (vector[row] * pattern.column_vector[row + 1:]).astype(dtype)
+            return
+
+        self.weights_matrix = self.weights_matrix.astype(dtype, copy=False)
+
+        for start in range(0, size, block_size):
+            stop = min(start + block_size, size)
+            self.weights_matrix[start:stop] += np.outer(vector[start:stop], pattern.column_vector).astype(dtype)
+
+        np.fill_diagonal(self.weights_matrix, 0)
 
     def add_pattern(self, pattern : Pattern) -> bool:
         if self.contains_pattern(pattern):
             return False
        
-        self.weights_matrix += pattern.weight_matrix
-        self.patterns.append(deepcopy(pattern))
+        self.update_weights(pattern, 1)
+        self.pattern_index[pattern.packed_bits.tobytes()] = len(self.patterns)
+        self.patterns.append(pattern)
 
         return True
 
     def remove_pattern(self, pattern : Pattern) -> bool:
-        for index, stored_pattern in enumerate(self.patterns):
-            if np.array_equal(stored_pattern.picture_matrix, pattern.picture_matrix):
-                self.weights_matrix -= pattern.weight_matrix
-                del self.patterns[index]
-                return True
-            
-        return False
+        index = self.pattern_index.pop(pattern.packed_bits.tobytes(), None)
+        if index is None:
+            return False
+
+        self.update_weights(self.patterns[index], -1)
+        del self.patterns[index]
+
+        for moved_index in range(index, len(self.patterns)):
+            self.pattern_index[self.patterns[moved_index].packed_bits.tobytes()] = moved_index
+
+        return True
     
     def contains_pattern(self, pattern : Pattern) -> bool:
-        for stored_pattern in self.patterns:
-            if np.array_equal(stored_pattern.picture_matrix, pattern.picture_matrix):
-                return True
-            
-        return False
+        return pattern.packed_bits.tobytes() in self.pattern_index
     
     def contains_pattern_vector(self, input_vector) -> bool:
-        for stored_pattern in self.patterns:
-            if np.array_equal(stored_pattern.column_vector, input_vector):
-                return True
-            
-        return False
+        return self.find_pattern_vector(input_vector) >= 0
+
+    # index ulozeneho vzoru zhodneho s bipolarnym vektorom, -1 ak nie je (aj ked vektor obsahuje nuly)
+    def find_pattern_vector(self, input_vector) -> int:
+        input_vector = np.asarray(input_vector)
+        if input_vector.size != self.grid_size ** 2 or (np.abs(input_vector) != 1).any():
+            return -1
+
+        return self.pattern_index.get(vector_key(input_vector), -1)
+
+    # indexy ulozenych vzorov zhodnych s riadkami vectors, -1 ak sa riadok nezhoduje so ziadnym
+    def match_patterns(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors).reshape(-1, self.grid_size ** 2)
+
+        return np.array([self.find_pattern_vector(vector) for vector in vectors], dtype=np.int64)
+
+    def start_statistics(self, mode : str) -> RecoveryStatistics:
+        return None if self.recovery_hook is None else RecoveryStatistics(mode)
+
+    def finish_statistics(self, statistics : RecoveryStatistics) -> None:
+        if statistics is not None:
+            self.recovery_hook(statistics)
 
     def synchronous_recovery(self, input_pattern : Pattern) -> Pattern:
-        result_vector = np.sign(np.dot(input_pattern.column_vector, self.weights_matrix))
+        statistics = self.start_statistics("synchronous")
+
+        input_vector = input_pattern.column_vector
+        fields = self.local_fields(input_vector)
+        # nulove pole znamena vypnuty pixel, rovnako ako pri prevode vysledku na obrazok
+        result_vector = np.where(fields > 0, 1, -1).astype(np.int32)
+
+        if statistics is not None:
+            statistics.stop()
+
+            result_fields = self.local_fields(result_vector)
+            statistics.flips = int((result_vector != input_vector).sum())
+            statistics.sweeps = int(statistics.flips > 0)
+            statistics.energies = [float(energy(input_vector, fields)), float(energy(result_vector, result_fields))]
+            statistics.converged = bool((np.where(result_fields > 0, 1, -1) == result_vector).all())
+            statistics.pattern_index = self.find_pattern_vector(result_vector)
+            self.finish_statistics(statistics)
+
+        if not self.contains_pattern_vector(result_vector):
+            return None
+
         result_image = np.where(result_vector == -1, 0, result_vector).reshape((self.grid_size, self.grid_size))
 
-        recovered_pattern = Pattern(result_image)
+        return Pattern(result_image)
 
-        return recovered_pattern if self.contains_pattern(recovered_pattern) else None
+    # Synchronna obnova pre N bipolarnych vektorov naraz (pole N x D). Kazda iteracia je jedno
+    # maticove nasobenie, riadky ktore sa uz nemenia z vypoctu vypadnu. Nulove pole vypne
+    # neuron (-1) ako v synchronous_recovery, prva iteracia je teda zhodna s nou. Vrati obnovene vektory a indexy zhodnych vzorov (-1 = ziadny).
+    def batch_recovery(self, probes, max_iterations : int = 100) -> tuple[np.ndarray, np.ndarray]:
+        statistics = self.start_statistics("batch")
+        states = np.array(probes, dtype=np.int8).reshape(-1, self.grid_size ** 2)
 
-    def asynchronous_recovery(self, input_pattern : Pattern):
-        input_vector = deepcopy(input_pattern.column_vector)
+        if statistics is not None:
+            statistics.sweeps = np.zeros(len(states), dtype=np.int64)
+            statistics.flips = np.zeros(len(states), dtype=np.int64)
+            energies = np.zeros(len(states))
 
-        prev_vector = None
-        iterations = 0
+        active = np.arange(len(states))
+        for _ in range(max_iterations):
+            current = states[active]
+            fields = self.local_fields(current)
+            updated = np.where(fields > 0, 1, -1).astype(np.int8)
 
-        while True:
-            for index in range(len(input_vector)):
-                input_vector[index] = np.sign(np.dot(input_vector, self.weights_matrix[:, index]))
+            flips = (updated != current).sum(axis=1)
+            changed = flips > 0
+            states[active] = updated
+
+            if statistics is not None:
+                # polia su pre stav pred zmenou, takze energia zaostava o jednu iteraciu
+                energies[active] = energy(current, fields)
+                statistics.energies.append(energies.copy())
+                statistics.sweeps[active[changed]] += 1
+                statistics.flips[active] += flips
+
+            active = active[changed]
+
+            if active.size == 0:
+                break
+
+        matches = self.match_patterns(states)
+
+        if statistics is not None:
+            statistics.stop()
+            statistics.converged = np.ones(len(states), dtype=bool)
+            statistics.converged[active] = False
+            statistics.pattern_index = matches
+            self.finish_statistics(statistics)
+
+        return states, matches
+
+    # Asynchronna obnova s udrziavanym lokalnym polom h = W s. Pole sa meni len pri zmene
+    # neuronu (o (nova - stara hodnota) * W[i]), takze cena je O(D) na zmenu namiesto O(D) na kazdy neuron.
+    # Neuron dostane sign(h_i) ako v povodnej verzii, pri nulovom poli teda 0 (vo vysledku vypnuty pixel).
+    # order: "sequential", "permuted" (jedna nahodna permutacia) alebo "random" (nova v kazdom prechode).
+    # Konci po prvom prechode bez preklopenia.
+    def asynchronous_recovery(self, input_pattern : Pattern, order : str = "sequential", seed = None, max_sweeps : int = 100):
+        statistics = self.start_statistics("asynchronous")
+        size = self.grid_size ** 2
+        rng = np.random.default_rng(seed)
+
+        state = np.array(input_pattern.column_vector, dtype=np.int64)
+        field = self.local_fields(state).astype(np.int64)
 
-            iterations += 1
+        if statistics is not None:
+            statistics.energies.append(float(energy(state, field)))
 
-            if not np.array_equal(input_vector, prev_vector):
-                iterations = 0
+        if order == "sequential":
+            permutation = np.arange(size)
+        elif order in ("permuted", "random"):
+            permutation = rng.permutation(size)
+        else:
+            raise ValueError("Unknown update order: {}".format(order))
 
-            prev_vector = deepcopy(input_vector)
+        for _ in range(max_sweeps):
+            if order == "random":
+                permutation = rng.permutation(size)
 
-            if iterations >= self.stable_iterations:
+            flips = 0
+            position = 0
+            while position < size:
+                # dalsi neuron v poradi, ktoreho hodnota nie je sign jeho pola
+                remaining = permutation[position:]
+                unstable = np.flatnonzero(np.sign(field[remaining]) != state[remaining])
+                if unstable.size == 0:
+                    break
+
+                index = remaining[unstable[0]]
+                value = np.sign(field[index])
+                field += (value - state[index]) * self.weight_rows(index, index + 1)[0]
+                state[index] = value
+
+                flips += 1
+                position += unstable[0] + 1
+
+            if flips == 0:
                 break
 
-        result_image = np.where(input_vector == -1, 0, input_vector).reshape((self.grid_size, self.grid_size))
-        recovered_pattern = Pattern(result_image)
+            if statistics is not None:
+                statistics.sweeps += 1
+                statistics.flips += flips
+                statistics.energies.append(float(energy(state, field)))
+
+        if statistics is not None:
+            statistics.stop()
+            statistics.converged = not (np.sign(field) != state).any()
+            statistics.pattern_index = self.find_pattern_vector(np.where(state > 0, 1, -1))
+            self.finish_statistics(statistics)
+
+        if not self.contains_pattern_vector(np.where(state > 0, 1, -1)):
+            return None
+
+        result_image = np.where(state > 0, 1, 0).reshape((self.grid_size, self.grid_size))
 
-        return recovered_pattern if self.contains_pattern(recovered_pattern) else None
+        return Pattern(result_image)
     
     def save_network(self, path : str) -> None:
-        with open(path, 'wb') as file:
-            pickle.dump(self, file)
+        weights = self.weights_triangle if self.triangular else self.weights_matrix
+        pattern_shape = self.patterns[0].shape if self.patterns else (self.grid_size, self.grid_size)
+        packed_length = -(-(self.grid_size ** 2) // 8)
+        packed_patterns = np.array([pattern.packed_bits for pattern in self.patterns], dtype=np.uint8).reshape(len(self.patterns), packed_length)
+
+        header = {
+            "grid_size" : self.grid_size,
+            "stable_iterations" : self.stable_iterations,
+            "triangular" : self.triangular,
+            "weights_dtype" : np.dtype(weights.dtype).str,
+            "weights_shape" : list(weights.shape),
+            "pattern_count" : len(self.patterns),
+            "pattern_shape" : list(pattern_shape),
+            "packed_length" : packed_length
+        }
+
+        # posuny poli sa pocitaju z dlzky hlavicky, ktora ich sama obsahuje - dlzka sa ustali po par krokoch
+        header["weights_offset"] = header["patterns_offset"] = 0
+        while True:
+            header_bytes = json.dumps(header).encode()
+            data_start = len(MAGIC) + FILE_HEADER.size + len(header_bytes)
+            weights_offset = -(-data_start // ALIGNMENT) * ALIGNMENT
+            patterns_offset = -(-(weights_offset + weights.nbytes) // ALIGNMENT) * ALIGNMENT
+
+            if header["weights_offset"] == weights_offset and header["patterns_offset"] == patterns_offset:
+                break
+
+            header["weights_offset"] = weights_offset
+            header["patterns_offset"] = patterns_offset
 
-    def load_network(path : str):
+        # zapis do docasneho suboru a nahradenie - vahy mozu byt namapovane prave z path
+        # (load_network s mmap=True), prepisanie na mieste by ich odrezalo pod rukami
+        temporary_path = path + ".tmp"
+
+        with open(temporary_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(FILE_HEADER.pack(VERSION, len(header_bytes)))
+            file.write(header_bytes)
+
+            file.write(b"\0" * (weights_offset - file.tell()))
+            file.write(np.ascontiguousarray(weights).tobytes())
+
+            file.write(b"\0" * (patterns_offset - file.tell()))
+            file.write(packed_patterns.tobytes())
+        os.replace(temporary_path, path)
+
+    # mmap=True namapuje vahy zo suboru (copy-on-write), takze sa nacitaju len stranky,
+    # ktore obnova skutocne pouzije. Subory zo starsej verzie (pickle) sa nacitaju po starom.
+    def load_network(path : str, mmap : bool = True):
         with open(path, 'rb') as file:
-            return pickle.load(file)
+            if file.read(len(MAGIC)) != MAGIC:
+                file.seek(0)
+                return pickle.load(file)
+
+            version, header_length = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+            if version != VERSION:
+                raise ValueError("Unsupported network file version {}".format(version))
+
+            header = json.loads(file.read(header_length).decode())
+
+            file.seek(header["patterns_offset"])
+            packed_patterns = np.frombuffer(file.read(header["pattern_count"] * header["packed_length"]), dtype=np.uint8)
+            packed_patterns = packed_patterns.reshape(header["pattern_count"], header["packed_length"])
+
+            weights_dtype = np.dtype(header["weights_dtype"])
+            weights_shape = tuple(header["weights_shape"])
+
+            if mmap:
+                weights = np.memmap(path, dtype=weights_dtype, mode='c', offset=header["weights_offset"], shape=weights_shape)
+            else:
+                file.seek(header["weights_offset"])
+                weights = np.fromfile(file, dtype=weights_dtype, count=int(np.prod(weights_shape))).reshape(weights_shape)
+
+        network = HopfieldNetwork.__new__(HopfieldNetwork)
+        network.grid_size = header["grid_size"]
+        network.stable_iterations = header["stable_iterations"]
+        network.triangular = header["triangular"]
+        network.weights_matrix = None if network.triangular else weights
+        network.weights_triangle = weights if network.triangular else None
+        network.patterns = [Pattern.from_packed(packed, header["pattern_shape"]) for packed in packed_patterns]
+        network.rebuild_index()
+
+        return network
         
 # network = HopfieldNetwork(2, 3)
 # pattern = Pattern(np.array([[1, 0], [0, 1]]))
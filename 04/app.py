@@ -26,6 +26,7 @@ class QLearningApp:
         self.create_widgets()
         self.mouse_coords = None
         self.network = None
+        self.environment = None
 
         # self.load_map("map.txt")
         # self.train()
@@ -88,11 +89,17 @@ class QLearningApp:
         self.grid[i][j] = self.current_sprite
         self.sprite_ids[i][j] = self.canvas.create_image(j * self.cell_size, i * self.cell_size, anchor=tk.NW, image=self.sprites[self.current_sprite])
 
+        if self.environment is not None:
+            self.environment.set_tile(i, j, self.current_sprite)
+
     def train(self):
-        environ = ql.EnvironmentMatrix(self.grid, self.scores)
-        self.network = ql.QLearning(environ)
+        # prostredie sa stavia len raz, dalsie upravy mapy ho menia cez set_tile
+        if self.environment is None:
+            self.environment = ql.EnvironmentMatrix(self.grid, self.scores)
+
+        self.network = ql.QLearning(self.environment)
 
-        self.network.train(self.mouse_coords, 1000, 0.6, False)
+        self.network.train_batch(1000, 0.6, False)
 
     def showMatrix(self):
         if not self.network:
@@ -105,27 +112,19 @@ class QLearningApp:
                 cell_index = row * self.grid_size + column
                 
                 if (row - 1) >= 0:
-                    top = (row - 1) * self.grid_size + column
-
-                    text = "{:.1f}".format(q_matrix[cell_index][top])
+                    text = "{:.1f}".format(q_matrix[cell_index][ql.TOP])
                     self.canvas.create_text(column * self.cell_size, row * self.cell_size, fill="blue", anchor=tk.NW, text=text)
                     
                 if (row + 1) < self.grid_size:
-                    bottom = (row + 1) * self.grid_size + column
-
-                    text = "{:.1f}".format(q_matrix[cell_index][bottom])
+                    text = "{:.1f}".format(q_matrix[cell_index][ql.BOTTOM])
                     self.canvas.create_text(column * self.cell_size + (self.cell_size // 2), row * self.cell_size + (self.cell_size // 2), fill="red", anchor=tk.NW, text=text)
 
                 if (column - 1) >= 0:
-                    left = cell_index - 1
-
-                    text = "{:.1f}".format(q_matrix[cell_index][left])
+                    text = "{:.1f}".format(q_matrix[cell_index][ql.LEFT])
                     self.canvas.create_text(column * self.cell_size, row * self.cell_size + (self.cell_size // 2), fill="green", anchor=tk.NW, text=text)
 
                 if (column + 1) < self.grid_size:
-                    right = cell_index + 1
-
-                    text = "{:.1f}".format(q_matrix[cell_index][right])
+                    text = "{:.1f}".format(q_matrix[cell_index][ql.RIGHT])
                     self.canvas.create_text(column * self.cell_size  + (self.cell_size // 2), row * self.cell_size, fill="yellow", anchor=tk.NW, text=text)
 
     def chase(self):
@@ -177,6 +176,7 @@ class QLearningApp:
                     self.sprite_ids = [[None for _ in range(self.grid_size)] for _ in range(self.grid_size)]
                     self.canvas.config(width=self.grid_size * self.cell_size, height = self.grid_size * self.cell_size)
 
+            self.environment = None
             self.redraw_canvas()
 
     def redraw_canvas(self):
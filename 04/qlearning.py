@@ -3,70 +3,175 @@ from copy import deepcopy
 import pickle
 import random
 
+# akcie (stlpce tabuliek prostredia a Q): pohyb hore, dole, dolava, doprava
+TOP, BOTTOM, LEFT, RIGHT = range(4)
+ACTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# zotrvanie na cieli (prechod syr -> syr z povodnej hustej matice), platne len v cielovych stavoch
+STAY = len(ACTIONS)
+
+# kody policok v celociselnej mape prostredia
+TILES = ('floor', 'wall', 'cat', 'cheese', 'mouse')
+TILE_CODES = {tile : code for code, tile in enumerate(TILES)}
+CHEESE = TILE_CODES['cheese']
+
+# mapa ako pole kodov policok - zo zoznamu riadkov s nazvami alebo uz hotove pole kodov
+def tile_codes(environment) -> np.ndarray:
+    if isinstance(environment, np.ndarray) and np.issubdtype(environment.dtype, np.integer):
+        return environment.astype(np.uint8)
+
+    names, inverse = np.unique(np.array(environment, dtype=str), return_inverse=True)
+    lookup = np.array([TILE_CODES[name] for name in names], dtype=np.uint8)
+
+    return lookup[inverse].reshape(len(environment), -1)
+
+# Z kazdeho stavu vedu najviac 4 prechody a zo syra navyse prechod na seba, takze namiesto
+# husteho (N^2 x N^2) pola sa uklada len tabulka susedov (stavy x 5, -1 = neplatna akcia)
+# a odmien za prechod (skore ciela prechodu, -1 = neplatna akcia, rovnako ako nevyplnene
+# prvky povodnej matice). Obe tabulky sa skladaju z posunutych vyrezov mapy, zmena jedneho
+# policka (set_tile) prepise len odmeny jeho 4 susedov a jeho vlastny stlpec STAY.
 class EnvironmentMatrix:
     def __init__(self, environment, score_dict : dict) -> None:
         self.environment_dimension = len(environment)
-        self.environment = environment
+        self.codes = tile_codes(environment)
         self.score_dict = score_dict
-        matrix_dimension = self.environment_dimension ** 2
-        self.target_states = []
+        self.scores = np.array([score_dict.get(tile, -1) for tile in TILES])
 
-        self.matrix = np.full(shape=(matrix_dimension, matrix_dimension), fill_value=-1)
+        dimension = self.environment_dimension
+        indices = np.arange(dimension ** 2).reshape(dimension, dimension)
 
-        for row in range(self.environment_dimension):
-            for column in range(self.environment_dimension):
-                matrix_index = row * self.environment_dimension + column
+        neighbours = np.full(shape=(dimension, dimension, len(ACTIONS) + 1), fill_value=-1, dtype=np.int64)
+        neighbours[1:, :, TOP] = indices[:-1, :]
+        neighbours[:-1, :, BOTTOM] = indices[1:, :]
+        neighbours[:, 1:, LEFT] = indices[:, :-1]
+        neighbours[:, :-1, RIGHT] = indices[:, 1:]
+        neighbours[:, :, STAY] = np.where(self.codes == CHEESE, indices, -1)
 
-                if (row - 1) >= 0:
-                    top = (row - 1) * self.environment_dimension + column
-                    self.matrix[matrix_index][top] = score_dict[environment[row - 1][column]]
-                    
-                if (row + 1) < self.environment_dimension:
-                    bottom = (row + 1) * self.environment_dimension + column
-                    self.matrix[matrix_index][bottom] = score_dict[environment[row + 1][column]]
+        self.neighbours = neighbours.reshape(-1, len(ACTIONS) + 1)
+        self.rewards = np.where(self.neighbours >= 0, self.scores[self.codes.ravel()][self.neighbours], -1)
+        self.target_states = np.flatnonzero(self.codes.ravel() == CHEESE).tolist()
 
-                if (column - 1) >= 0:
-                    left = matrix_index - 1
-                    self.matrix[matrix_index][left] = score_dict[environment[row][column - 1]]
+    def tile_score(self, row : int, column : int):
+        return self.scores[self.codes[row][column]]
 
-                if (column + 1) < self.environment_dimension:
-                    right = matrix_index + 1
-                    self.matrix[matrix_index][right] = score_dict[environment[row][column + 1]]
+    # zmena jedneho policka: odmeny za vstup na neho zo 4 susedov, zotrvanie na nom a zoznam cielov
+    def set_tile(self, row : int, column : int, tile) -> None:
+        code = TILE_CODES[tile] if isinstance(tile, str) else tile
+        state = row * self.environment_dimension + column
 
-                if environment[row][column] == 'cheese':
-                    self.matrix[matrix_index][matrix_index] = score_dict[environment[row][column]]
-                    self.target_states.append(matrix_index)
+        self.codes[row][column] = code
+
+        for action in range(len(ACTIONS)):
+            neighbour = self.neighbours[state][action]
+            if neighbour >= 0:
+                # sused vstupuje na policko opacnou akciou (hore <-> dole, dolava <-> doprava)
+                self.rewards[neighbour][action ^ 1] = self.scores[code]
+
+        self.neighbours[state][STAY] = state if code == CHEESE else -1
+        self.rewards[state][STAY] = self.scores[code] if code == CHEESE else -1
+
+        if code == CHEESE and state not in self.target_states:
+            self.target_states.append(state)
+        elif code != CHEESE and state in self.target_states:
+            self.target_states.remove(state)
 
 class QLearning:
     def __init__(self, environment : EnvironmentMatrix) -> None:
-        self.q_matrix = np.zeros(environment.matrix.shape)
+        self.q_matrix = np.zeros(environment.rewards.shape)
         self.environment  = environment
 
     def train(self, starting_location : tuple[int, int], num_epochs : int, learning_rate : float, maximize_next_state = False):
         for epoch in range(num_epochs):
             agent_start = np.random.random_integers(0, self.environment.environment_dimension - 1, 2)
-            while self.environment.score_dict[self.environment.environment[agent_start[0]][agent_start[1]]] < 0:
+            while self.environment.tile_score(agent_start[0], agent_start[1]) < 0:
                 agent_start = np.random.random_integers(0, self.environment.environment_dimension - 1, 2)
 
             current_state = agent_start[0] * self.environment.environment_dimension + agent_start[1] 
             print("epoch {} / {}".format(epoch + 1, num_epochs))
 
             while True :
+                rewards = self.environment.rewards[current_state]
+
                 if maximize_next_state:
-                    next_states = np.argwhere(self.environment.matrix[current_state] >= np.amax(self.environment.matrix[current_state])).flatten()
+                    actions = np.argwhere(rewards >= np.amax(rewards)).flatten()
                 else:
-                    next_states = np.argwhere(self.environment.matrix[current_state] >= 0).flatten()
+                    actions = np.argwhere(rewards >= 0).flatten()
 
-                next_state = random.choice(next_states)
-                new_score = self.environment.matrix[current_state][next_state] + learning_rate * np.amax(self.q_matrix[next_state])
+                action = random.choice(actions)
+                next_state = self.environment.neighbours[current_state][action]
+                new_score = rewards[action] + learning_rate * np.amax(self.q_matrix[next_state])
 
-                self.q_matrix[current_state][next_state] = new_score
+                self.q_matrix[current_state][action] = new_score
 
                 if current_state in self.environment.target_states:
                     break
 
                 current_state = next_state
 
+    # Trenovanie davky agentov naraz: kazdy krok je jedna operacia nad polami pre vsetkych agentov.
+    # Akcia sa vyberie rovnomerne nahodne z platnych akcii (maska sa pocita raz pre cely trening),
+    # agent, ktory dosiahne ciel (alebo max_steps), zacne na jeho mieste dalsiu epizodu, kym ich
+    # nie je num_episodes. Ak viac agentov v jednom kroku zapisuje ten isty prvok Q, zapisuju
+    # rovnaku hodnotu, lebo vsetci citaju Q z predosleho kroku. Vrati pocet epizod, ktore dosli k cielu.
+    def train_batch(self, num_episodes : int, learning_rate : float, maximize_next_state = False, agents : int = 64, seed = None, max_steps : int = None) -> int:
+        rng = np.random.default_rng(seed)
+        rewards = self.environment.rewards
+        neighbours = self.environment.neighbours
+        states = len(rewards)
+
+        if maximize_next_state:
+            valid = rewards >= np.amax(rewards, axis=1, keepdims=True)
+        else:
+            valid = rewards >= 0
+        valid &= neighbours >= 0
+
+        terminal = np.zeros(states, dtype=bool)
+        terminal[self.environment.target_states] = True
+
+        starts = np.flatnonzero(self.environment.scores[self.environment.codes.ravel()] >= 0)
+        if starts.size == 0 or num_episodes <= 0:
+            return 0
+
+        if max_steps is None:
+            max_steps = 10 * states
+
+        agents = min(agents, num_episodes)
+        current = rng.choice(starts, agents)
+        steps = np.zeros(agents, dtype=np.int64)
+        active = np.arange(agents)
+        started = agents
+        reached = 0
+
+        while active.size:
+            state = current[active]
+            mask = valid[state]
+
+            # nahodny kluc pre kazdu akciu, neplatne akcie nikdy nevyhraju
+            keys = rng.random((active.size, rewards.shape[1]))
+            keys[~mask] = -1.0
+            action = np.argmax(keys, axis=1)
+
+            movable = mask.any(axis=1)
+            next_state = neighbours[state, action]
+
+            updated = state[movable], action[movable]
+            self.q_matrix[updated] = rewards[updated] + learning_rate * np.amax(self.q_matrix[next_state[movable]], axis=1)
+
+            current[active] = np.where(movable, next_state, state)
+            steps[active] += 1
+
+            finished = terminal[state] | ~movable | (steps[active] >= max_steps)
+            reached += int(np.count_nonzero(terminal[state]))
+
+            done = active[finished]
+            respawned = done[:max(0, min(done.size, num_episodes - started))]
+            current[respawned] = rng.choice(starts, respawned.size)
+            steps[respawned] = 0
+            started += respawned.size
+
+            active = np.concatenate((active[~finished], respawned))
+
+        return reached
+
     def get_steps(self, start : tuple[int, int], max_length = 1000) -> list[tuple[int, int]]:
         current_state = start[0] * self.environment.environment_dimension + start[1] 
         
@@ -74,14 +179,16 @@ class QLearning:
 
         length = 0
         while current_state not in self.environment.target_states and length < max_length:
-            next_states = np.argwhere(self.q_matrix[current_state] >= np.amax(self.q_matrix[current_state])).flatten()
-            next_state = random.choice(next_states)
+            # v hustej matici mali nesusedne stavy Q 0, takze nekladne maximum znamenalo koniec
+            actions = np.argwhere(self.q_matrix[current_state] >= np.amax(self.q_matrix[current_state])).flatten()
+            action = random.choice(actions)
             
-            value = self.q_matrix[current_state][next_state]
+            value = self.q_matrix[current_state][action]
 
-            if value == 0:
+            if value <= 0:
                 return None
             
+            next_state = self.environment.neighbours[current_state][action]
             steps.append((next_state // self.environment.environment_dimension, next_state % self.environment.environment_dimension))
             length += 1
 
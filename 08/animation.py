@@ -0,0 +1,116 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+from mandlebrot import calculateMandelbrotGrid, colorizeIterations, createAxis
+
+# Animacia priblizovania k bodu center. Sirka snimky sa meni geometricky zo start_span na end_span.
+def zoomIntervals(width : int, height : int, center : tuple[float, float], start_span : float, end_span : float, frames : int) -> list[tuple[tuple[float, float], tuple[float, float]]]:
+    intervals = []
+
+    for frame in range(frames):
+        t = frame / float(max(1, frames - 1))
+        x_span = start_span * (end_span / start_span) ** t
+        y_span = x_span * height / float(width)
+
+        intervals.append(((center[0] - x_span / 2.0, center[0] + x_span / 2.0),
+                          (center[1] - y_span / 2.0, center[1] + y_span / 2.0)))
+
+    return intervals
+
+# True tam, kde ma pixel rovnaky pocet iteracii ako vsetkych 8 susedov
+def uniformMask(iterations):
+    mask = np.zeros(iterations.shape, dtype=bool)
+    center = iterations[1:-1, 1:-1]
+    inner = np.ones(center.shape, dtype=bool)
+
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            inner &= iterations[1 + dy:iterations.shape[0] - 1 + dy, 1 + dx:iterations.shape[1] - 1 + dx] == center
+
+    mask[1:-1, 1:-1] = inner
+    return mask
+
+# Prevezme pocty z predchadzajucej snimky tam, kde najblizsi stary pixel lezi v rovnomernej oblasti.
+# Pixel sa moze prebrat najviac max_age snimok po sebe, potom sa prepocita, aby sa pri priblizeni
+# objavili aj detaily mensie nez povodny pixel.
+# Vrati ciastocne vyplnene pocty, ich vek a masku pixelov, ktore treba dopocitat.
+def resampleFrame(previous_iterations, previous_age, previous_intervals, intervals, width : int, height : int, max_age : int = 3):
+    previous_height, previous_width = previous_iterations.shape
+    (previous_x, previous_y) = previous_intervals
+    (x_interval, y_interval) = intervals
+
+    x_axis = createAxis(width, x_interval)
+    y_axis = createAxis(height, y_interval)
+
+    columns = np.rint((x_axis - previous_x[0]) / ((previous_x[1] - previous_x[0]) / previous_width)).astype(np.int64)
+    rows = np.rint((y_axis - previous_y[0]) / ((previous_y[1] - previous_y[0]) / previous_height)).astype(np.int64)
+
+    valid_columns = (columns >= 0) & (columns < previous_width)
+    valid_rows = (rows >= 0) & (rows < previous_height)
+    columns = np.clip(columns, 0, previous_width - 1)
+    rows = np.clip(rows, 0, previous_height - 1)
+
+    reusable = uniformMask(previous_iterations) & (previous_age < max_age)
+    reuse = valid_rows[:, np.newaxis] & valid_columns[np.newaxis, :] & reusable[rows[:, np.newaxis], columns[np.newaxis, :]]
+
+    iterations = np.where(reuse, previous_iterations[rows[:, np.newaxis], columns[np.newaxis, :]], 0).astype(np.int32)
+    age = np.where(reuse, previous_age[rows[:, np.newaxis], columns[np.newaxis, :]] + 1, 0).astype(np.int32)
+
+    return iterations, age, ~reuse
+
+def saveFrame(iterations, max_iter : int, palette, path : str) -> None:
+    Image.fromarray(colorizeIterations(iterations, max_iter, palette)).save(path)
+
+# output je bud adresar (ocislovane PNG), alebo binarny stream (napr. stdin ffmpeg -f rawvideo -pix_fmt rgb24)
+def createZoomAnimation(image_width : int, image_height : int, center : tuple[float, float], start_span : float, end_span : float, frames : int, m : float, output, max_iter : int = 1000, processes : int = None, reuse : bool = True, interior_check : bool = True, palette = "hsv") -> None:
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    write_png = isinstance(output, str)
+    if write_png:
+        os.makedirs(output, exist_ok=True)
+
+    intervals = zoomIntervals(image_width, image_height, center, start_span, end_span, frames)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending_saves = []
+        previous_iterations = None
+        previous_age = None
+
+        for frame, (x_interval, y_interval) in enumerate(intervals):
+            if reuse and previous_iterations is not None:
+                iterations, age, compute = resampleFrame(previous_iterations, previous_age, intervals[frame - 1], (x_interval, y_interval), image_width, image_height)
+            else:
+                iterations = np.zeros((image_height, image_width), dtype=np.int32)
+                age = np.zeros((image_height, image_width), dtype=np.int32)
+                compute = np.ones((image_height, image_width), dtype=bool)
+
+            rows, columns = np.nonzero(compute)
+            c = np.empty(rows.size, dtype=np.complex128)
+            c.real = createAxis(image_width, x_interval)[columns]
+            c.imag = createAxis(image_height, y_interval)[rows]
+
+            # body na dopocitanie sa rozdelia medzi procesy, zapis predoslej snimky bezi medzitym v poole
+            chunks = np.array_split(np.arange(rows.size), processes)
+            futures = [(chunk, executor.submit(calculateMandelbrotGrid, c[chunk], m, max_iter, interior_check)) for chunk in chunks if chunk.size > 0]
+
+            for chunk, future in futures:
+                iterations[rows[chunk], columns[chunk]] = future.result()
+
+            if write_png:
+                pending_saves.append(executor.submit(saveFrame, iterations, max_iter, palette, os.path.join(output, "frame_{:05d}.png".format(frame))))
+            else:
+                output.write(colorizeIterations(iterations, max_iter, palette).tobytes())
+
+            previous_iterations = iterations
+            previous_age = age
+
+        for future in pending_saves:
+            future.result()
+
+if __name__ == "__main__":
+    center = (-1.1853, -0.3051)
+
+    createZoomAnimation(640, 480, center, 3.0, 0.002, 120, 2.0, "zoom_frames")
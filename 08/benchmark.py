@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import mandlebrot as mb
+
+# Meranie priepustnosti (Mpixel/s) a spickovej RSS pre jednotlive casti mandlebrot.py.
+# Kazdy pripad bezi v samostatnom procese, aby bola RSS namerana len pre neho.
+#   python benchmark.py --sizes 256 1024 --max-iter 100 1000 --output results.json --baseline baseline.json
+
+regions = {
+    "full" : ((-2.0, 1.0), (-1.0, 1.0)),
+    "zoom2" : ((-1.1863, -1.1843), (-0.3061, -0.3041))
+}
+
+def runEngine(kernel : str, width : int, height : int, x_interval, y_interval, max_iter : int):
+    if kernel == "python":
+        return mb.createPixels(width, height, x_interval, y_interval, 2.0, max_iter)
+    if kernel == "numpy":
+        return mb.calculateMandelbrotGrid(mb.createGrid(width, height, x_interval, y_interval), 2.0, max_iter)
+    if kernel == "numpy_interior":
+        return mb.calculateMandelbrotGrid(mb.createGrid(width, height, x_interval, y_interval), 2.0, max_iter, True)
+    if kernel == "mariani":
+        return mb.calculateMandelbrotMariani(width, height, x_interval, y_interval, 2.0, max_iter)
+    if kernel == "parallel":
+        return mb.createPixelArrayParallel(width, height, x_interval, y_interval, 2.0, max_iter)
+
+    raise ValueError("Unknown kernel: {}".format(kernel))
+
+def peakRss() -> float:
+    if resource is None:
+        return None
+
+    # ru_maxrss je v kB na Linuxe, v bajtoch na macOS
+    scale = 1.0 if sys.platform == "darwin" else 1024.0
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+    return round(usage * scale / (1024.0 * 1024.0), 1)
+
+def runCase(kernel : str, region : str, width : int, height : int, max_iter : int, repeat : int) -> dict:
+    x_interval, y_interval = regions[region]
+
+    # farbenie a zapis sa meraju na vopred spocitanych iteraciach
+    if kernel in ("colorize", "colorize_smooth", "save_png", "stream_png"):
+        iterations = mb.calculateMandelbrotGrid(mb.createGrid(width, height, x_interval, y_interval), 2.0, max_iter, True, kernel == "colorize_smooth")
+        pixels = mb.colorizeIterations(iterations, max_iter)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        if kernel in ("colorize", "colorize_smooth"):
+            mb.colorizeIterations(iterations, max_iter)
+        elif kernel == "save_png":
+            with tempfile.TemporaryDirectory() as directory:
+                Image.fromarray(pixels).save(os.path.join(directory, "image.png"))
+        elif kernel == "stream_png":
+            with tempfile.TemporaryDirectory() as directory:
+                mb.createMandleBrotImageStreaming(width, height, x_interval, y_interval, 2.0, os.path.join(directory, "image.png"), max_iter, interior_check=True)
+        else:
+            runEngine(kernel, width, height, x_interval, y_interval, max_iter)
+
+        times.append(time.perf_counter() - start)
+
+    seconds = min(times)
+
+    return {
+        "kernel" : kernel,
+        "region" : region,
+        "width" : width,
+        "height" : height,
+        "max_iter" : max_iter,
+        "seconds" : seconds,
+        "mpixels_per_second" : width * height / seconds / 1e6,
+        "peak_rss_mb" : peakRss()
+    }
+
+def compareWithBaseline(results : list[dict], baseline : list[dict]) -> None:
+    reference = {(r["kernel"], r["region"], r["width"], r["height"], r["max_iter"]) : r for r in baseline}
+
+    for result in results:
+        key = (result["kernel"], result["region"], result["width"], result["height"], result["max_iter"])
+        if key in reference:
+            result["speedup"] = result["mpixels_per_second"] / reference[key]["mpixels_per_second"]
+
+def main(arguments = None) -> dict:
+    parser = argparse.ArgumentParser(description="Mandelbrot benchmark")
+    parser.add_argument("--kernels", nargs="+", default=["numpy", "numpy_interior", "mariani", "parallel", "colorize", "colorize_smooth", "save_png", "stream_png"])
+    parser.add_argument("--regions", nargs="+", default=list(regions), choices=list(regions))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[256, 1024])
+    parser.add_argument("--max-iter", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    args = parser.parse_args(arguments)
+
+    cases = [(kernel, region, size, size, max_iter, args.repeat)
+             for kernel in args.kernels
+             for region in args.regions
+             for size in args.sizes
+             for max_iter in args.max_iter]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for case in cases:
+            result = executor.submit(runCase, *case).result()
+            results.append(result)
+
+            print("{kernel:>16} {region:>6} {width:>5}x{height:<5} max_iter={max_iter:<6} {mpixels_per_second:10.3f} Mpix/s  {seconds:8.3f} s  rss={peak_rss_mb} MB".format(**result))
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            compareWithBaseline(results, json.load(file)["results"])
+
+        for result in results:
+            if "speedup" in result:
+                print("{kernel:>16} {region:>6} {width:>5}x{height:<5} max_iter={max_iter:<6} speedup {speedup:.2f}x".format(**result))
+
+    report = {
+        "python" : platform.python_version(),
+        "numpy" : np.__version__,
+        "machine" : platform.machine(),
+        "cpu_count" : os.cpu_count(),
+        "results" : results
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    return report
+
+if __name__ == "__main__":
+    main()
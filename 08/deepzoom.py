@@ -0,0 +1,120 @@
+import numpy as np
+from decimal import Decimal, localcontext
+from PIL import Image
+
+from mandlebrot import colorizeIterations
+
+# Hlboky zoom pomocou perturbacie: jedna referencna orbita sa pocita v Decimal
+# s potrebnou presnostou, ostatne pixely sa iteruju ako float64 odchylka dz od nej.
+# float64 odchylky staci na priblizenie az po ~1e-300.
+
+def referencePrecision(pixel_size : Decimal) -> int:
+    return max(30, int(-pixel_size.log10()) + 20)
+
+def createReferenceOrbit(center : tuple[Decimal, Decimal], m : float, max_iter : int, precision : int):
+    orbit = np.zeros(max_iter + 1, dtype=np.complex128)
+
+    with localcontext() as context:
+        context.prec = precision
+
+        c_real = Decimal(center[0])
+        c_imag = Decimal(center[1])
+        bailout = Decimal(m) * Decimal(m)
+
+        z_real = Decimal(0)
+        z_imag = Decimal(0)
+
+        for num_iter in range(max_iter + 1):
+            orbit[num_iter] = complex(float(z_real), float(z_imag))
+
+            if z_real * z_real + z_imag * z_imag > bailout:
+                return orbit[:num_iter + 1]
+
+            z_real, z_imag = z_real * z_real - z_imag * z_imag + c_real, 2 * z_real * z_imag + c_imag
+
+    return orbit
+
+# dc su odchylky pixelov od stredu referencnej orbity
+def calculateMandelbrotPerturbation(orbit, dc, m : float, max_iter : int):
+    dc = np.asarray(dc, dtype=np.complex128)
+    iterations = np.full(dc.size, max_iter, dtype=np.int32)
+
+    active = np.arange(dc.size)
+    dc_active = dc.flatten()
+    dz = np.zeros(dc.size, dtype=np.complex128)
+    reference_index = np.zeros(dc.size, dtype=np.int64)
+    last_index = len(orbit) - 1
+
+    for num_iter in range(max_iter):
+        z = orbit[reference_index] + dz
+        absolute = np.abs(z)
+
+        inside = absolute <= m
+        if not inside.all():
+            iterations[active[~inside]] = num_iter
+
+            active = active[inside]
+            dc_active = dc_active[inside]
+            dz = dz[inside]
+            z = z[inside]
+            absolute = absolute[inside]
+            reference_index = reference_index[inside]
+
+            if active.size == 0:
+                break
+
+        # rebasing - ak je z blizsie k nule ako odchylka, alebo referencna orbita skoncila,
+        # pokracuje sa od zaciatku orbity s dz = z (odstranuje glitche)
+        rebase = (absolute < np.abs(dz)) | (reference_index == last_index)
+        dz[rebase] = z[rebase]
+        reference_index[rebase] = 0
+
+        reference = orbit[reference_index]
+        dz = 2.0 * reference * dz + dz * dz + dc_active
+        reference_index += 1
+
+    return iterations.reshape(dc.shape)
+
+def createDeltaGrid(width : int, height : int, pixel_size : Decimal):
+    step = float(pixel_size)
+
+    grid = np.empty((height, width), dtype=np.complex128)
+    grid.real = (np.arange(width) - width / 2.0) * step
+    grid.imag = (np.arange(height) - height / 2.0)[:, np.newaxis] * step
+
+    return grid
+
+# center a span sa zadavaju ako retazce alebo Decimal, aby sa nestratila presnost
+def calculateDeepZoom(width : int, height : int, center : tuple, span, m : float, max_iter : int):
+    center = (Decimal(center[0]), Decimal(center[1]))
+    span = Decimal(span)
+
+    with localcontext() as context:
+        context.prec = 50
+        pixel_size = span / width
+
+    orbit = createReferenceOrbit(center, m, max_iter, referencePrecision(pixel_size))
+
+    return calculateMandelbrotPerturbation(orbit, createDeltaGrid(width, height, pixel_size), m, max_iter)
+
+def createDeepZoomImage(image_width : int, image_height : int, center : tuple, span, m : float, path, max_iter : int = 1000, palette = "hsv") -> None:
+    iterations = calculateDeepZoom(image_width, image_height, center, span, m, max_iter)
+
+    new_image = Image.fromarray(colorizeIterations(iterations, max_iter, palette))
+    new_image.save(path)
+
+def deepPixelToCoords(image_width : int, image_height : int, center : tuple, span, p_x : int, p_y : int) -> tuple[Decimal, Decimal]:
+    center = (Decimal(center[0]), Decimal(center[1]))
+    span = Decimal(span)
+
+    with localcontext() as context:
+        context.prec = referencePrecision(span / image_width)
+        pixel_size = span / image_width
+
+        return (center[0] + (p_x - Decimal(image_width) / 2) * pixel_size,
+                center[1] + (p_y - Decimal(image_height) / 2) * pixel_size)
+
+if __name__ == "__main__":
+    center = ("-0.743643887037158704752191506114774", "0.131825904205311970493132056385139")
+
+    createDeepZoomImage(1000, 1000, center, "1e-20", 2.0, "1k_deep_zoom.png", 30000)
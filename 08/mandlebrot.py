@@ -1,21 +1,318 @@
 import colorsys
+import os
+import struct
+import zlib
 import numpy as np
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+# hlavna kardioida a kruh periody 2, body v nich nikdy neuniknu (plati len pre m >= 2)
+def isInterior(x, y):
+    q = (x - 0.25) ** 2 + y ** 2
+
+    return (q * (q + (x - 0.25)) < 0.25 * y ** 2) | ((x + 1.0) ** 2 + y ** 2 < 0.0625)
 
 #x - realna zlozka, y - imaginarna
-def calculateMandelbrot(c : complex, m : float, max_iter : int):
+def calculateMandelbrot(c : complex, m : float, max_iter : int, interior_check : bool = False):
+    if interior_check and m >= 2.0 and isInterior(c.real, c.imag):
+        return max_iter
+
     z = 0
     num_iter = 0
 
+    # Brentova detekcia cyklu - ak sa z presne zopakuje, orbita je periodicka a nikdy neunikne
+    saved = z
+    steps = 0
+    limit = 8
+
     while(abs(z) <= m) and (num_iter < max_iter):
         z = (z ** 2) + c
         num_iter += 1
 
+        if interior_check:
+            if z == saved:
+                return max_iter
+
+            steps += 1
+            if steps == limit:
+                saved = z
+                steps = 0
+                limit *= 2
+
     return num_iter
 
+# z sa drzi ako dve float64 polia, aby vysledok bol bit po bite zhodny s calculateMandelbrot
+# smooth vrati realny pocet iteracii n + 1 - log2(log|z|) namiesto celeho cisla
+def calculateMandelbrotGrid(c, m : float, max_iter : int, interior_check : bool = False, smooth : bool = False):
+    c = np.asarray(c, dtype=np.complex128)
+    iterations = np.full(c.size, max_iter, dtype=np.int32)
+    escape_abs = np.zeros(c.size) if smooth else None
+
+    active = np.arange(c.size)
+    c_real = c.real.flatten()
+    c_imag = c.imag.flatten()
+
+    if interior_check and m >= 2.0:
+        outside = ~isInterior(c_real, c_imag)
+
+        active = active[outside]
+        c_real = c_real[outside]
+        c_imag = c_imag[outside]
+
+    z_real = np.zeros(active.size)
+    z_imag = np.zeros(active.size)
+    saved_real = np.zeros(active.size)
+    saved_imag = np.zeros(active.size)
+    steps = 0
+    limit = 8
+
+    for num_iter in range(max_iter):
+        absolute = np.hypot(z_real, z_imag)
+        inside = absolute <= m
+        iterations[active[~inside]] = num_iter
+
+        if smooth:
+            escape_abs[active[~inside]] = absolute[~inside]
+
+        if interior_check and num_iter > 0:
+            # periodicke body si ponechaju max_iter
+            inside &= (z_real != saved_real) | (z_imag != saved_imag)
+
+        if not inside.all():
+            active = active[inside]
+            c_real = c_real[inside]
+            c_imag = c_imag[inside]
+            z_real = z_real[inside]
+            z_imag = z_imag[inside]
+            saved_real = saved_real[inside]
+            saved_imag = saved_imag[inside]
+
+            if active.size == 0:
+                break
+
+        if interior_check and num_iter > 0:
+            steps += 1
+            if steps == limit:
+                saved_real = z_real.copy()
+                saved_imag = z_imag.copy()
+                steps = 0
+                limit *= 2
+
+        z_real, z_imag = (z_real * z_real - z_imag * z_imag) + c_real, (z_real * z_imag + z_imag * z_real) + c_imag
+
+    if smooth:
+        return smoothIterations(iterations, escape_abs, max_iter).reshape(c.shape)
+
+    return iterations.reshape(c.shape)
+
+def smoothIterations(iterations, escape_abs, max_iter : int):
+    result = iterations.astype(np.float64)
+
+    escaped = (iterations < max_iter) & (escape_abs > 1.0)
+    result[escaped] += 1.0 - np.log2(np.log(escape_abs[escaped]))
+    result[iterations < max_iter] = np.clip(result[iterations < max_iter], 0.0, max_iter - 1.0)
+
+    return result
+
+# rovnake scitavanie krokov ako v createPixels, aby suradnice sedeli presne
+def createAxis(count : int, interval : tuple[float, float]):
+    step = (interval[1] - interval[0]) / float(count)
+
+    return np.cumsum(np.concatenate(([interval[0]], np.full(count - 1, step))))
+
+# tile = (x, y, sirka, vyska) v pixeloch, None znamena cely obrazok
+def createGrid(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], tile : tuple[int, int, int, int] = None):
+    if tile is None:
+        tile = (0, 0, width, height)
+
+    x, y, tile_width, tile_height = tile
+
+    grid = np.empty((tile_height, tile_width), dtype=np.complex128)
+    grid.real = createAxis(width, x_interval)[x:x + tile_width]
+    grid.imag = createAxis(height, y_interval)[y:y + tile_height, np.newaxis]
+
+    return grid
+
+def hsvPalette(mb : int, max_iter : int) -> tuple[float, float, float]:
+    hue = (1.0 - (mb / float(max_iter)))
+
+    return colorsys.hsv_to_rgb(hue, 1.0, 1.0) if hue != 0.0 else (0.0, 0.0, 0.0)
+
+def grayscalePalette(mb : int, max_iter : int) -> tuple[float, float, float]:
+    value = (1.0 - (mb / float(max_iter)))
+
+    return (value, value, value)
+
+def firePalette(mb : int, max_iter : int) -> tuple[float, float, float]:
+    if mb >= max_iter:
+        return (0.0, 0.0, 0.0)
+
+    t = (mb / float(max_iter)) ** 0.5
+
+    return (min(1.0, 3.0 * t), min(1.0, max(0.0, 3.0 * t - 1.0)), min(1.0, max(0.0, 3.0 * t - 2.0)))
+
+palettes = {
+    "hsv" : hsvPalette,
+    "grayscale" : grayscalePalette,
+    "fire" : firePalette
+}
+
+# paleta je bud nazov z palettes, alebo funkcia (mb, max_iter) -> (r, g, b) v <0, 1>
+@lru_cache(maxsize=32)
+def createPaletteLUT(max_iter : int, palette = "hsv"):
+    palette_function = palettes[palette] if isinstance(palette, str) else palette
+
+    lut = np.zeros((max_iter + 1, 3), dtype=np.uint8)
+    for mb in range(max_iter + 1):
+        pixel = palette_function(mb, max_iter)
+        lut[mb] = (int(pixel[0] * 255.0), int(pixel[1] * 255.0), int(pixel[2] * 255.0))
+
+    lut.flags.writeable = False
+    return lut
+
+# realne hodnoty (smooth) sa linearne interpoluju medzi susednymi farbami palety
+def colorizeIterations(iterations, max_iter : int, palette = "hsv"):
+    lut = createPaletteLUT(max_iter, palette)
+
+    if np.issubdtype(iterations.dtype, np.integer):
+        return lut[iterations]
+
+    interior = iterations >= max_iter
+    values = np.clip(iterations, 0.0, max_iter - 1.0)
+    lower = np.floor(values).astype(np.int32)
+    upper = np.minimum(lower + 1, max_iter - 1)
+    fraction = (values - lower)[..., np.newaxis]
+
+    colors = (lut[lower] * (1.0 - fraction) + lut[upper] * fraction).astype(np.uint8)
+    colors[interior] = lut[max_iter]
+
+    return colors
+
+def createPixelArray(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, interior_check : bool = False, palette = "hsv", smooth : bool = False):
+    iterations = calculateMandelbrotGrid(createGrid(width, height, x_interval, y_interval), m, max_iter, interior_check, smooth)
+
+    return colorizeIterations(iterations, max_iter, palette)
+
+# Mariani-Silver: ak ma okraj obdlznika vsade rovnaky pocet iteracii, vnutro sa len vyplni
+def calculateMandelbrotMariani(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, interior_check : bool = False, min_size : int = 16):
+    x_axis = createAxis(width, x_interval)
+    y_axis = createAxis(height, y_interval)
+
+    iterations = np.zeros((height, width), dtype=np.int32)
+    computed = np.zeros((height, width), dtype=bool)
+
+    def compute(rows, columns):
+        missing = ~computed[rows, columns]
+        rows = rows[missing]
+        columns = columns[missing]
+
+        if rows.size == 0:
+            return
 
-def createPixels(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int):
+        # rovnaky pixel moze byt v poli viackrat (spolocne okraje)
+        unique = np.unique(rows * width + columns)
+        rows = unique // width
+        columns = unique % width
+
+        c = np.empty(rows.size, dtype=np.complex128)
+        c.real = x_axis[columns]
+        c.imag = y_axis[rows]
+
+        iterations[rows, columns] = calculateMandelbrotGrid(c, m, max_iter, interior_check)
+        computed[rows, columns] = True
+
+    # obdlzniky jednej urovne sa pocitaju naraz, aby sa numpy volalo s velkymi poliami
+    level = [(0, 0, width, height)]
+    while level:
+        borders = []
+        all_rows = []
+        all_columns = []
+
+        for x, y, rect_width, rect_height in level:
+            if rect_width <= min_size or rect_height <= min_size:
+                rows, columns = np.nonzero(np.ones((rect_height, rect_width), dtype=bool))
+                all_rows.append(rows + y)
+                all_columns.append(columns + x)
+                continue
+
+            xs = np.arange(x, x + rect_width)
+            ys = np.arange(y + 1, y + rect_height - 1)
+            rows = np.concatenate((np.full(rect_width, y), np.full(rect_width, y + rect_height - 1), ys, ys))
+            columns = np.concatenate((xs, xs, np.full(len(ys), x), np.full(len(ys), x + rect_width - 1)))
+
+            borders.append(((x, y, rect_width, rect_height), rows, columns))
+            all_rows.append(rows)
+            all_columns.append(columns)
+
+        compute(np.concatenate(all_rows), np.concatenate(all_columns))
+
+        level = []
+        for (x, y, rect_width, rect_height), rows, columns in borders:
+            border = iterations[rows, columns]
+            if (border == border[0]).all():
+                iterations[y + 1:y + rect_height - 1, x + 1:x + rect_width - 1] = border[0]
+                computed[y + 1:y + rect_height - 1, x + 1:x + rect_width - 1] = True
+                continue
+
+            half_width = rect_width // 2
+            half_height = rect_height // 2
+
+            level.append((x, y, half_width, half_height))
+            level.append((x + half_width, y, rect_width - half_width, half_height))
+            level.append((x, y + half_height, half_width, rect_height - half_height))
+            level.append((x + half_width, y + half_height, rect_width - half_width, rect_height - half_height))
+
+    return iterations
+
+# bez tile_size sa obrazok deli na pasy riadkov, inak na stvorce tile_size x tile_size
+def createTiles(width : int, height : int, tile_size : int = None, processes : int = 1) -> list[tuple[int, int, int, int]]:
+    if tile_size is None:
+        band_height = max(1, -(-height // (processes * 4)))
+        return [(0, y, width, min(band_height, height - y)) for y in range(0, height, band_height)]
+
+    return [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+            for y in range(0, height, tile_size)
+            for x in range(0, width, tile_size)]
+
+def renderTile(shared_name : str, width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, tile : tuple[int, int, int, int], interior_check : bool = False, palette = "hsv", smooth : bool = False) -> None:
+    x, y, tile_width, tile_height = tile
+
+    iterations = calculateMandelbrotGrid(createGrid(width, height, x_interval, y_interval, tile), m, max_iter, interior_check, smooth)
+
+    shared = shared_memory.SharedMemory(name=shared_name)
+    try:
+        array = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shared.buf)
+        array[y:y + tile_height, x:x + tile_width] = colorizeIterations(iterations, max_iter, palette)
+        del array
+    finally:
+        shared.close()
+
+def createPixelArrayParallel(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, processes : int = None, tile_size : int = None, interior_check : bool = False, palette = "hsv", smooth : bool = False):
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    shared = shared_memory.SharedMemory(create=True, size=width * height * 3)
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(renderTile, shared.name, width, height, x_interval, y_interval, m, max_iter, tile, interior_check, palette, smooth)
+                       for tile in createTiles(width, height, tile_size, processes)]
+
+            for future in futures:
+                future.result()
+
+        array = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shared.buf).copy()
+    finally:
+        shared.close()
+        shared.unlink()
+
+    return array
+
+
+def createPixels(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, interior_check : bool = False, palette = "hsv"):
     pixels = [0] * (width * height)
+    colors = [tuple(color) for color in createPaletteLUT(max_iter, palette).tolist()]
     
     x_step = (x_interval[1] - x_interval[0]) / float(width)
     y_step = (y_interval[1] - y_interval[0]) / float(height)
@@ -24,15 +321,8 @@ def createPixels(width : int, height : int, x_interval : tuple[float, float], y_
     for p_y in range(height): 
         x = x_interval[0]
         for p_x in range(width):
-            mb = calculateMandelbrot(complex(x, y), m, max_iter)
-            hue = (1.0 - (mb / float(max_iter)))
-            saturation = 1.0
-            value = 1.0
-
-            pixel = colorsys.hsv_to_rgb(hue, saturation, value) if hue != 0.0 else (0.0, 0.0, 0.0)
-            pixels[p_x + p_y * width] = (int(pixel[0] * 255.0), 
-                                         int(pixel[1] * 255.0), 
-                                         int(pixel[2] * 255.0))
+            mb = calculateMandelbrot(complex(x, y), m, max_iter, interior_check)
+            pixels[p_x + p_y * width] = colors[mb]
             
             x += x_step
             
@@ -41,11 +331,114 @@ def createPixels(width : int, height : int, x_interval : tuple[float, float], y_
 
     return pixels
 
-def createMandleBrotImage(image_width : int, image_height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, path) -> None:
-    pixels = createPixels(image_width, image_height, x_interval, y_interval, m, 1000)
-    
-    array = np.array(pixels).reshape((image_height, image_width, 3))
-    array = np.array(array, dtype=np.uint8)
+class PngStreamWriter:
+    SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+    def __init__(self, path, width : int, height : int, compression_level : int = 6) -> None:
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.compressor = zlib.compressobj(compression_level)
+        self.file = open(path, "wb")
+
+        self.file.write(PngStreamWriter.SIGNATURE)
+        self.write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def write_chunk(self, chunk_type : bytes, data : bytes) -> None:
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def write_rows(self, rows) -> None:
+        rows = np.asarray(rows, dtype=np.uint8).reshape((-1, self.width * 3))
+
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("Too many rows for image of height {}".format(self.height))
+
+        # kazdy riadok zacina bajtom filtra (0 = bez filtra)
+        raw = np.zeros((len(rows), self.width * 3 + 1), dtype=np.uint8)
+        raw[:, 1:] = rows
+
+        data = self.compressor.compress(raw.tobytes())
+        if data:
+            self.write_chunk(b"IDAT", data)
+
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+
+        try:
+            if self.rows_written != self.height:
+                raise ValueError("Expected {} rows, got {}".format(self.height, self.rows_written))
+
+            self.write_chunk(b"IDAT", self.compressor.flush())
+            self.write_chunk(b"IEND", b"")
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+def createPixelRows(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, chunk_rows : int, interior_check : bool = False, palette = "hsv", smooth : bool = False):
+    for y in range(0, height, chunk_rows):
+        tile = (0, y, width, min(chunk_rows, height - y))
+        iterations = calculateMandelbrotGrid(createGrid(width, height, x_interval, y_interval, tile), m, max_iter, interior_check, smooth)
+
+        yield y, colorizeIterations(iterations, max_iter, palette)
+
+# pamat je obmedzena velkostou pasu chunk_rows x sirka, nie celym obrazkom
+def createMandleBrotImageStreaming(image_width : int, image_height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, path, max_iter : int = 1000, chunk_rows : int = 256, interior_check : bool = False, palette = "hsv", smooth : bool = False) -> None:
+    rows = createPixelRows(image_width, image_height, x_interval, y_interval, m, max_iter, chunk_rows, interior_check, palette, smooth)
+
+    if str(path).endswith(".npy"):
+        output = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(image_height, image_width, 3))
+
+        for y, pixels in rows:
+            output[y:y + len(pixels)] = pixels
+
+        output.flush()
+        del output
+        return
+
+    with PngStreamWriter(path, image_width, image_height) as writer:
+        for _, pixels in rows:
+            writer.write_rows(pixels)
+
+def createMandleBrotImage(image_width : int, image_height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, path, max_iter : int = 1000, engine : str = "numpy", processes : int = 1, tile_size : int = None, chunk_rows : int = None, interior_check : bool = False, palette = "hsv", smooth : bool = False) -> None:
+    if engine == "numpy" and chunk_rows is not None:
+        createMandleBrotImageStreaming(image_width, image_height, x_interval, y_interval, m, path, max_iter, chunk_rows, interior_check, palette, smooth)
+        return
+
+    if engine == "numpy" and processes != 1:
+        array = createPixelArrayParallel(image_width, image_height, x_interval, y_interval, m, max_iter, processes, tile_size, interior_check, palette, smooth)
+    elif engine == "numpy":
+        array = createPixelArray(image_width, image_height, x_interval, y_interval, m, max_iter, interior_check, palette, smooth)
+    elif engine == "mariani":
+        if smooth:
+            raise ValueError("Smooth coloring is not supported by the mariani engine")
+
+        iterations = calculateMandelbrotMariani(image_width, image_height, x_interval, y_interval, m, max_iter, interior_check)
+        array = colorizeIterations(iterations, max_iter, palette)
+    elif engine == "python":
+        if smooth:
+            raise ValueError("Smooth coloring is not supported by the python engine")
+
+        pixels = createPixels(image_width, image_height, x_interval, y_interval, m, max_iter, interior_check, palette)
+
+        array = np.array(pixels).reshape((image_height, image_width, 3))
+        array = np.array(array, dtype=np.uint8)
+    else:
+        raise ValueError("Unknown engine: {}".format(engine))
+
     new_image = Image.fromarray(array)
     new_image.save(path)
 
@@ -55,13 +448,14 @@ def pixel_to_coords(image_width : int, image_height : int, x_interval : tuple[fl
 
     return (x_interval[0] + p_x * x_step, y_interval[0] + p_y * y_step)
 
-image_width = 15000
-image_height = (image_width * 2) // 3
+if __name__ == "__main__":
+    image_width = 15000
+    image_height = (image_width * 2) // 3
 
-#createMandleBrotImage(image_width, image_height, (-2.0, 1.0), (-1.0, 1.0), 2.0, "15k_no_zoom.png")
-#print(pixel_to_coords(image_width, image_height, (-2.0, 1.0), (-1.0, 1.0), 4067, 3481))
+    #createMandleBrotImage(image_width, image_height, (-2.0, 1.0), (-1.0, 1.0), 2.0, "15k_no_zoom.png", chunk_rows=256)
+    #print(pixel_to_coords(image_width, image_height, (-2.0, 1.0), (-1.0, 1.0), 4067, 3481))
 
-#createMandleBrotImage(1000, 1000, (-1.2865, -1.0865), (-0.4037, -0.2037), 2.0, "1k_zoom1.png")
-#print(pixel_to_coords(1000, 1000, (-1.2865, -1.0865), (-0.4037, -0.2037), 506, 493))
+    #createMandleBrotImage(1000, 1000, (-1.2865, -1.0865), (-0.4037, -0.2037), 2.0, "1k_zoom1.png")
+    #print(pixel_to_coords(1000, 1000, (-1.2865, -1.0865), (-0.4037, -0.2037), 506, 493))
 
-createMandleBrotImage(1000, 1000, (-1.1863, -1.1843), (-0.3061, -0.3041), 2.0, "1k_zoom2.png")
+    createMandleBrotImage(1000, 1000, (-1.1863, -1.1843), (-0.3061, -0.3041), 2.0, "1k_zoom2.png", interior_check=True)
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import numpy as np
+from collections import OrderedDict
+from PIL import Image
+
+from mandlebrot import calculateMandelbrotGrid, colorizeIterations, createAxis
+
+# Perzistentna cache poctov iteracii na disku. Kazda dlazdica je jeden .npy subor,
+# kluc je (hranice dlazdice v komplexnej rovine, rozlisenie, m, max_iter), pripadne aj
+# presne suradnice pixelov dlazdice (axes), ak nie su urcene samotnymi hranicami.
+# Pri prekroceni max_bytes sa mazu najdlhsie nepouzite dlazdice (LRU podla mtime).
+class TileCache:
+    def __init__(self, directory : str, max_bytes : int = 1 << 30) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith(".npy")]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime_ns):
+            self.entries[entry.path] = entry.stat().st_size
+            self.size += entry.stat().st_size
+
+        self.evict()
+
+    def key_path(self, bounds : tuple[float, float, float, float], resolution : tuple[int, int], m : float, max_iter : int, axes : tuple = None) -> str:
+        key = "{}|{}x{}|{}|{}".format(",".join(float(bound).hex() for bound in bounds), resolution[0], resolution[1], float(m).hex(), max_iter)
+
+        if axes is not None:
+            key += "|" + "|".join(hashlib.sha1(np.ascontiguousarray(axis, dtype=np.float64).tobytes()).hexdigest() for axis in axes)
+
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".npy")
+
+    def get(self, bounds : tuple[float, float, float, float], resolution : tuple[int, int], m : float, max_iter : int, axes : tuple = None):
+        path = self.key_path(bounds, resolution, m, max_iter, axes)
+
+        if path not in self.entries:
+            self.misses += 1
+            return None
+
+        try:
+            iterations = np.load(path)
+        except (OSError, ValueError):
+            self.remove(path)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(path)
+        os.utime(path)
+        self.hits += 1
+
+        return iterations
+
+    def put(self, bounds : tuple[float, float, float, float], resolution : tuple[int, int], m : float, max_iter : int, iterations, axes : tuple = None) -> None:
+        path = self.key_path(bounds, resolution, m, max_iter, axes)
+        temporary_path = path + ".tmp"
+
+        with open(temporary_path, "wb") as file:
+            np.save(file, iterations)
+        os.replace(temporary_path, path)
+
+        if path in self.entries:
+            self.size -= self.entries.pop(path)
+
+        self.entries[path] = os.path.getsize(path)
+        self.size += self.entries[path]
+
+        self.evict()
+
+    def evict(self) -> None:
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, path : str) -> None:
+        self.size -= self.entries.pop(path, 0)
+
+        if os.path.exists(path):
+            os.remove(path)
+
+    def clear(self) -> None:
+        for path in list(self.entries):
+            self.remove(path)
+
+# Snimka sa rozdeli na dlazdice tile_size x tile_size a kazda sa hlada podla presnych
+# suradnic svojich pixelov z createAxis, takze vysledok je bit po bite zhodny s
+# createMandleBrotImage a opakovane vykreslenie (napr. s inou paletou) je cele z cache.
+# Snimky s inym vyrezom alebo rozlisenim maju ine suradnice a dlazdice nezdielaju.
+#
+# lattice=True namiesto toho polozi dlazdice na globalnu mriezku s krokom snimky a zaciatok
+# snimky na nu zaokruhli. Prekryvajuce sa snimky s rovnakym krokom (posuny) potom dlazdice
+# zdielaju, ale obraz je posunuty az o pol pixela oproti createMandleBrotImage.
+def calculateMandelbrotCached(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, cache : TileCache, tile_size : int = 256, interior_check : bool = False, lattice : bool = False):
+    if lattice:
+        return calculateMandelbrotLattice(width, height, x_interval, y_interval, m, max_iter, cache, tile_size, interior_check)
+
+    x_frame = createAxis(width, x_interval)
+    y_frame = createAxis(height, y_interval)
+
+    iterations = np.zeros((height, width), dtype=np.int32)
+
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            x_axis = x_frame[x:x + tile_size]
+            y_axis = y_frame[y:y + tile_size]
+
+            bounds = (x_axis[0], x_axis[-1], y_axis[0], y_axis[-1])
+            resolution = (x_axis.size, y_axis.size)
+            tile = cache.get(bounds, resolution, m, max_iter, (x_axis, y_axis))
+
+            if tile is None:
+                grid = np.empty((y_axis.size, x_axis.size), dtype=np.complex128)
+                grid.real = x_axis
+                grid.imag = y_axis[:, np.newaxis]
+
+                tile = calculateMandelbrotGrid(grid, m, max_iter, interior_check)
+                cache.put(bounds, resolution, m, max_iter, tile, (x_axis, y_axis))
+
+            iterations[y:y + y_axis.size, x:x + x_axis.size] = tile
+
+    return iterations
+
+def calculateMandelbrotLattice(width : int, height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, max_iter : int, cache : TileCache, tile_size : int = 256, interior_check : bool = False):
+    x_step = (x_interval[1] - x_interval[0]) / float(width)
+    y_step = (y_interval[1] - y_interval[0]) / float(height)
+
+    origin_x = round(x_interval[0] / x_step)
+    origin_y = round(y_interval[0] / y_step)
+
+    iterations = np.zeros((height, width), dtype=np.int32)
+
+    for tile_y in range(origin_y // tile_size, (origin_y + height - 1) // tile_size + 1):
+        for tile_x in range(origin_x // tile_size, (origin_x + width - 1) // tile_size + 1):
+            x_axis = (tile_x * tile_size + np.arange(tile_size)) * x_step
+            y_axis = (tile_y * tile_size + np.arange(tile_size)) * y_step
+
+            bounds = (x_axis[0], x_axis[-1], y_axis[0], y_axis[-1])
+            tile = cache.get(bounds, (tile_size, tile_size), m, max_iter)
+
+            if tile is None:
+                grid = np.empty((tile_size, tile_size), dtype=np.complex128)
+                grid.real = x_axis
+                grid.imag = y_axis[:, np.newaxis]
+
+                tile = calculateMandelbrotGrid(grid, m, max_iter, interior_check)
+                cache.put(bounds, (tile_size, tile_size), m, max_iter, tile)
+
+            # prienik dlazdice so snimkou v globalnych indexoch pixelov
+            start_x = max(tile_x * tile_size, origin_x)
+            end_x = min((tile_x + 1) * tile_size, origin_x + width)
+            start_y = max(tile_y * tile_size, origin_y)
+            end_y = min((tile_y + 1) * tile_size, origin_y + height)
+
+            iterations[start_y - origin_y:end_y - origin_y, start_x - origin_x:end_x - origin_x] = \
+                tile[start_y - tile_y * tile_size:end_y - tile_y * tile_size, start_x - tile_x * tile_size:end_x - tile_x * tile_size]
+
+    return iterations
+
+def createMandleBrotImageCached(image_width : int, image_height : int, x_interval : tuple[float, float], y_interval : tuple[float, float], m : float, path, cache : TileCache, max_iter : int = 1000, tile_size : int = 256, interior_check : bool = False, palette = "hsv", lattice : bool = False) -> None:
+    iterations = calculateMandelbrotCached(image_width, image_height, x_interval, y_interval, m, max_iter, cache, tile_size, interior_check, lattice)
+
+    new_image = Image.fromarray(colorizeIterations(iterations, max_iter, palette))
+    new_image.save(path)
+
+if __name__ == "__main__":
+    cache = TileCache("tile_cache", 512 * 1024 * 1024)
+
+    createMandleBrotImageCached(1000, 1000, (-1.1863, -1.1843), (-0.3061, -0.3041), 2.0, "1k_zoom2.png", cache, interior_check=True)
+    createMandleBrotImageCached(1000, 1000, (-1.1863, -1.1843), (-0.3061, -0.3041), 2.0, "1k_zoom2_fire.png", cache, interior_check=True, palette="fire")
@@ -0,0 +1,61 @@
+import csv
+import itertools
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from forestfire import ForestFire
+
+# Beh bez pygame okna: simulacia ide tak rychlo, ako sa da, a po kazdom kroku
+# sa zaznamena pocet prazdnych, stromov, ohnov a vyhorenych buniek.
+
+STATISTICS = ("empty", "tree", "fire", "burnt")
+
+def count_states(grid) -> np.ndarray:
+    return np.bincount(grid.ravel(), minlength=4)[:4]
+
+def run_simulation(width : int, height : int, p : float, f : float, initial_p : float, steps : int, seed = None) -> np.ndarray:
+    ff = ForestFire(width, height, p, f, initial_p, seed)
+
+    # riadok 0 je pociatocny stav, riadok i je stav po i krokoch
+    counts = np.zeros((steps + 1, 4), dtype=np.int64)
+    counts[0] = count_states(ff.grid)
+
+    for step in range(1, steps + 1):
+        ff.update()
+        counts[step] = count_states(ff.grid)
+
+    return counts
+
+def run_sweep_case(case : tuple) -> list[dict]:
+    width, height, p, f, initial_p, repeat, steps, seed = case
+    counts = run_simulation(width, height, p, f, initial_p, steps, seed)
+
+    return [dict(p=p, f=f, initial_p=initial_p, repeat=repeat, step=step, **dict(zip(STATISTICS, (int(value) for value in row))))
+            for step, row in enumerate(counts)]
+
+# Kazda kombinacia (p, f, initial_p, repeat) dostane vlastny seed odvodeny zo seed,
+# takze vysledok nezavisi od poctu procesov. Vysledok je "tidy" tabulka - jeden riadok na krok.
+def sweep(width : int, height : int, p_values, f_values, initial_p_values, steps : int, repeats : int = 1, processes : int = None, seed : int = None) -> list[dict]:
+    combinations = list(itertools.product(p_values, f_values, initial_p_values, range(repeats)))
+    seeds = np.random.SeedSequence(seed).spawn(len(combinations))
+
+    cases = [(width, height, p, f, initial_p, repeat, steps, case_seed)
+             for (p, f, initial_p, repeat), case_seed in zip(combinations, seeds)]
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as executor:
+        for case_rows in executor.map(run_sweep_case, cases):
+            rows.extend(case_rows)
+
+    return rows
+
+def save_csv(rows : list[dict], path : str) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["p", "f", "initial_p", "repeat", "step", *STATISTICS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    rows = sweep(1000, 1000, [0.01, 0.05, 0.1], [0.0001, 0.001], [0.5], 500, repeats=2, seed=0)
+    save_csv(rows, "sweep.csv")
@@ -1,4 +1,4 @@
-import random
+import numpy as np
 
 class ForestFire:
     EMPTY = 0
@@ -6,46 +6,130 @@ class ForestFire:
     FIRE = 2
     BURNT = 3
 
-    def __init__(self, width : int, height : int, p : float, f : float, initial_p : float) -> None:
+    # sparse=True zapne udalostny rezim (update_sparse) vhodny pre male f
+    def __init__(self, width : int, height : int, p : float, f : float, initial_p : float, seed : int = None, sparse : bool = False) -> None:
         self.width = width
         self.height = height
         self.p = p
         self.f = f
+        self.sparse = sparse
+        self.rng = np.random.default_rng(seed)
 
-        self.grid = [[ForestFire.EMPTY for _ in range(width)] for _ in range(height)]
+        self.grid = np.full((height, width), ForestFire.EMPTY, dtype=np.uint8)
+        self.grid[self.rng.random((height, width)) < initial_p] = ForestFire.TREE
 
-        for y in range(height):
-            for x in range(width):
-                if random.random() < initial_p:
-                    self.grid[y][x] = ForestFire.TREE
+        # ploche indexy horiacich a vyhorenych buniek pre sparse rezim, None = treba zistit z mriezky
+        self.fire_cells = None
+        self.burnt_cells = None
 
     def is_fire_neighbour(self, x : int, y : int) -> bool:
-        for dy in range(y - 1, y + 2):
-            if dy < 0 or dy >= self.height:
-                continue
-            for dx in range(x - 1, x + 2):
-                if (dy == y and x == x) or dx < 0 or dx >= self.width:
-                    continue 
-                if self.grid[dy][dx] == ForestFire.FIRE:
-                    return True
+        neighbourhood = self.grid[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2] == ForestFire.FIRE
+        neighbourhood[y - max(y - 1, 0), x - max(x - 1, 0)] = False
 
-        return False
+        return bool(neighbourhood.any())
+
+    def fire_neighbour_mask(self):
+        return fire_neighbour_mask(self.grid)
 
     def update(self):
-        new_grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
-
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-
-                if cell == ForestFire.EMPTY:
-                    if random.random() < self.p:
-                        new_grid[y][x] = 1  
-                elif cell == ForestFire.TREE: 
-                    if self.is_fire_neighbour(x, y) or (random.random() < self.f):
-                        new_grid[y][x] = ForestFire.FIRE
-                    else:
-                        new_grid[y][x] = ForestFire.TREE
-                elif cell == ForestFire.FIRE:
-                    new_grid[y][x] = ForestFire.BURNT
-        self.grid = new_grid
+        if self.sparse:
+            self.update_sparse()
+        else:
+            self.update_dense()
+
+    def update_dense(self):
+        # jedno nahodne cislo na bunku - prazdna bunka ho pouzije na rast, strom na vznietenie
+        random = self.rng.random((self.height, self.width))
+
+        self.grid = next_state(self.grid, self.fire_neighbour_mask(), random, self.p, self.f)
+        self.fire_cells = None
+        self.burnt_cells = None
+
+    # Indexy z range(count), z ktorych je kazdy vybrany s pravdepodobnostou probability.
+    # Namiesto pokusu pre kazdu bunku sa losuju geometricke dlzky preskokov medzi vybranymi.
+    def sample_cells(self, count : int, probability : float):
+        if probability <= 0.0 or count == 0:
+            return np.zeros(0, dtype=np.int64)
+        if probability >= 1.0:
+            return np.arange(count)
+
+        expected = count * probability
+        batch = int(expected + 5.0 * np.sqrt(expected) + 16)
+
+        positions = np.cumsum(self.rng.geometric(probability, batch)) - 1
+        while positions[-1] < count:
+            positions = np.concatenate((positions, positions[-1] + np.cumsum(self.rng.geometric(probability, batch))))
+
+        return positions[:np.searchsorted(positions, count)]
+
+    def neighbour_cells(self, cells):
+        y = cells // self.width
+        x = cells % self.width
+        neighbours = []
+
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy == 0 and dx == 0:
+                    continue
+
+                valid = (y + dy >= 0) & (y + dy < self.height) & (x + dx >= 0) & (x + dx < self.width)
+                neighbours.append(cells[valid] + dy * self.width + dx)
+
+        return np.unique(np.concatenate(neighbours))
+
+    # Udalostny krok: meni sa len fronta ohna, vyhorene bunky a bunky vybrane geometrickym
+    # preskakovanim pre rast (p) a vznietenie (f). Cena kroku zavisi od aktivity, nie od plochy.
+    def update_sparse(self):
+        cells = self.grid.reshape(-1)
+
+        if self.fire_cells is None:
+            self.fire_cells = np.flatnonzero(cells == ForestFire.FIRE)
+            self.burnt_cells = np.flatnonzero(cells == ForestFire.BURNT)
+
+        spread = self.neighbour_cells(self.fire_cells) if self.fire_cells.size else np.zeros(0, dtype=np.int64)
+        spread = spread[cells[spread] == ForestFire.TREE]
+
+        ignited = self.sample_cells(cells.size, self.f)
+        ignited = ignited[cells[ignited] == ForestFire.TREE]
+
+        grown = self.sample_cells(cells.size, self.p)
+        grown = grown[cells[grown] == ForestFire.EMPTY]
+
+        new_fire_cells = np.union1d(spread, ignited)
+
+        cells[self.burnt_cells] = ForestFire.EMPTY
+        cells[self.fire_cells] = ForestFire.BURNT
+        cells[new_fire_cells] = ForestFire.FIRE
+        cells[grown] = ForestFire.TREE
+
+        self.burnt_cells = self.fire_cells
+        self.fire_cells = new_fire_cells
+
+# True pre bunky, ktore maju aspon jedneho z 8 susedov v ohni (OR posunutych poli)
+def fire_neighbour_mask(grid):
+    fire = grid == ForestFire.FIRE
+    mask = np.zeros(fire.shape, dtype=bool)
+
+    mask[1:, :] |= fire[:-1, :]
+    mask[:-1, :] |= fire[1:, :]
+    mask[:, 1:] |= fire[:, :-1]
+    mask[:, :-1] |= fire[:, 1:]
+    mask[1:, 1:] |= fire[:-1, :-1]
+    mask[1:, :-1] |= fire[:-1, 1:]
+    mask[:-1, 1:] |= fire[1:, :-1]
+    mask[:-1, :-1] |= fire[1:, 1:]
+
+    return mask
+
+def next_state(grid, fire_neighbours, random, p : float, f : float):
+    new_grid = np.zeros(grid.shape, dtype=np.uint8)
+
+    empty = grid == ForestFire.EMPTY
+    tree = grid == ForestFire.TREE
+
+    new_grid[empty & (random < p)] = ForestFire.TREE
+    new_grid[tree] = ForestFire.TREE
+    new_grid[tree & (fire_neighbours | (random < f))] = ForestFire.FIRE
+    new_grid[grid == ForestFire.FIRE] = ForestFire.BURNT
+
+    return new_grid
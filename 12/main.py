@@ -2,6 +2,7 @@ import pygame
 import sys
 import time
 from forestfire import ForestFire
+from renderer import GridRenderer
 
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
@@ -27,11 +28,10 @@ pygame.init()
 screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 pygame.display.set_caption("Forest Fire")
 
+renderer = GridRenderer(screen, color_dict, CELL_SIZE)
+
 def draw_grid(ff : ForestFire):
-    for y in range(ff.height):
-        for x in range(ff.width):
-            color = color_dict[ff.grid[y][x]]
-            pygame.draw.rect(screen, color, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+    return renderer.draw(ff.grid)
 
 running = True
 while running:
@@ -40,8 +40,7 @@ while running:
             running = False
 
     ff.update()
-    draw_grid(ff)
-    pygame.display.flip()
+    pygame.display.update(draw_grid(ff))
     time.sleep(0.1) 
 
 pygame.quit()
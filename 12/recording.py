@@ -0,0 +1,168 @@
+import json
+import struct
+import zlib
+import numpy as np
+
+from forestfire import ForestFire
+
+# Zaznam behu simulacie. Stavy buniek maju 2 bity, takze sa balia po 4 do bajtu.
+# Kazda keyframe_interval-ta snimka je ulozena cela, ostatne ako XOR s predchadzajucou
+# zbalenou snimkou - nezmenene bunky daju nuly, ktore zlib skomprimuje takmer na nic.
+#
+# subor: MAGIC, hlavicka (verzia, sirka, vyska, keyframe_interval, dlzka metadat), metadata JSON,
+#        potom snimky: typ (0 = cela, 1 = delta), dlzka, zlib data
+
+MAGIC = b"FFRC"
+VERSION = 1
+HEADER = struct.Struct("<HIIII")
+FRAME_HEADER = struct.Struct("<BI")
+
+KEY_FRAME = 0
+DELTA_FRAME = 1
+
+def pack_states(grid) -> np.ndarray:
+    cells = np.asarray(grid, dtype=np.uint8).ravel()
+    padded = np.zeros(-(-cells.size // 4) * 4, dtype=np.uint8)
+    padded[:cells.size] = cells
+
+    return padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)
+
+def unpack_states(packed, width : int, height : int) -> np.ndarray:
+    cells = np.empty(packed.size * 4, dtype=np.uint8)
+    for shift in range(4):
+        cells[shift::4] = (packed >> (2 * shift)) & 3
+
+    return cells[:width * height].reshape((height, width))
+
+class RunRecorder:
+    def __init__(self, path : str, width : int, height : int, keyframe_interval : int = 100, metadata : dict = None, compression_level : int = 6) -> None:
+        self.width = width
+        self.height = height
+        self.keyframe_interval = keyframe_interval
+        self.compression_level = compression_level
+        self.frames = 0
+        self.previous = None
+
+        metadata_bytes = json.dumps(metadata or {}).encode()
+
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.file.write(HEADER.pack(VERSION, width, height, keyframe_interval, len(metadata_bytes)))
+        self.file.write(metadata_bytes)
+
+    def write(self, grid) -> None:
+        packed = pack_states(grid)
+
+        if self.previous is None or self.frames % self.keyframe_interval == 0:
+            frame_type, payload = KEY_FRAME, packed
+        else:
+            frame_type, payload = DELTA_FRAME, packed ^ self.previous
+
+        data = zlib.compress(payload.tobytes(), self.compression_level)
+        self.file.write(FRAME_HEADER.pack(frame_type, len(data)))
+        self.file.write(data)
+
+        self.previous = packed
+        self.frames += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+class RunReader:
+    def __init__(self, path : str) -> None:
+        self.path = path
+
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a forest fire recording".format(path))
+
+            version, self.width, self.height, self.keyframe_interval, metadata_length = HEADER.unpack(file.read(HEADER.size))
+            if version != VERSION:
+                raise ValueError("Unsupported recording version {}".format(version))
+
+            self.metadata = json.loads(file.read(metadata_length).decode())
+            self.data_offset = file.tell()
+
+        self.offsets = None
+
+    def read_frames(self, file, start_offset : int):
+        file.seek(start_offset)
+        packed = None
+
+        while True:
+            header = file.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+
+            frame_type, length = FRAME_HEADER.unpack(header)
+            payload = np.frombuffer(zlib.decompress(file.read(length)), dtype=np.uint8)
+
+            packed = payload if frame_type == KEY_FRAME else packed ^ payload
+            yield packed
+
+    # snimky sa citaju a rozbaluju postupne, v pamati je vzdy len jedna
+    def frames(self, start : int = 0):
+        if start == 0:
+            offset, skip = self.data_offset, 0
+        else:
+            keyframe = (start // self.keyframe_interval) * self.keyframe_interval
+            offset, skip = self.frame_offsets()[keyframe], start - keyframe
+
+        with open(self.path, "rb") as file:
+            for index, packed in enumerate(self.read_frames(file, offset)):
+                if index >= skip:
+                    yield unpack_states(packed, self.width, self.height)
+
+    def frame(self, index : int) -> np.ndarray:
+        return next(self.frames(index))
+
+    # pozicie snimok v subore, zistene len z hlaviciek bez dekompresie
+    def frame_offsets(self) -> list[int]:
+        if self.offsets is None:
+            self.offsets = []
+
+            with open(self.path, "rb") as file:
+                file.seek(self.data_offset)
+
+                while True:
+                    offset = file.tell()
+                    header = file.read(FRAME_HEADER.size)
+                    if len(header) < FRAME_HEADER.size:
+                        break
+
+                    self.offsets.append(offset)
+                    file.seek(FRAME_HEADER.unpack(header)[1], 1)
+
+        return self.offsets
+
+    def __len__(self) -> int:
+        return len(self.frame_offsets())
+
+    def __iter__(self):
+        return self.frames()
+
+    # pocty (prazdne, stromy, ohen, vyhorene) pre kazdu snimku bez ukladania mriezok
+    def statistics(self) -> np.ndarray:
+        return np.array([np.bincount(grid.ravel(), minlength=4)[:4] for grid in self.frames()])
+
+def record_run(ff : ForestFire, steps : int, path : str, keyframe_interval : int = 100) -> None:
+    metadata = {"p" : ff.p, "f" : ff.f, "steps" : steps}
+
+    with RunRecorder(path, ff.width, ff.height, keyframe_interval, metadata) as recorder:
+        recorder.write(ff.grid)
+
+        for _ in range(steps):
+            ff.update()
+            recorder.write(ff.grid)
+
+if __name__ == "__main__":
+    record_run(ForestFire(400, 300, 0.05, 0.001, 0.5, seed=0), 1000, "run.ffrc")
+
+    reader = RunReader("run.ffrc")
+    print(len(reader), reader.metadata, reader.statistics()[-1])
@@ -0,0 +1,50 @@
+import numpy as np
+import pygame
+
+# Vykreslovanie mriezky cez farebnu tabulku a jeden zapis do pixelov povrchu namiesto
+# pygame.draw.rect pre kazdu bunku. Pri dirty_only sa prekresluju len zmenene pasy riadkov.
+class GridRenderer:
+    def __init__(self, screen, color_dict : dict, cell_size : int, dirty_only : bool = True) -> None:
+        self.screen = screen
+        self.cell_size = cell_size
+        self.dirty_only = dirty_only
+        self.previous = None
+
+        self.lut = np.zeros((max(color_dict) + 1, 3), dtype=np.uint8)
+        for state, color in color_dict.items():
+            self.lut[state] = color
+
+    def changed_bands(self, grid) -> list[tuple[int, int]]:
+        if not self.dirty_only or self.previous is None or self.previous.shape != grid.shape:
+            return [(0, grid.shape[0])]
+
+        rows = np.flatnonzero((grid != self.previous).any(axis=1))
+        if rows.size == 0:
+            return []
+
+        # suvisle useky zmenenych riadkov
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    # vrati zoznam obdlznikov pre pygame.display.update
+    def draw(self, grid) -> list[pygame.Rect]:
+        grid = np.asarray(grid)
+        bands = self.changed_bands(grid)
+
+        width = grid.shape[1] * self.cell_size
+        rects = []
+
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        for start, end in bands:
+            colors = self.lut[grid[start:end]].repeat(self.cell_size, axis=0).repeat(self.cell_size, axis=1)
+            pixels[:width, start * self.cell_size:end * self.cell_size] = colors.transpose(1, 0, 2)
+
+            rects.append(pygame.Rect(0, start * self.cell_size, width, (end - start) * self.cell_size))
+        del pixels
+
+        self.previous = grid.copy()
+
+        return rects
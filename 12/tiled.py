@@ -0,0 +1,139 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from forestfire import ForestFire, fire_neighbour_mask, next_state
+
+# Simulacia velkych lesov (10k x 10k a viac) po dlazdiciach. Mriezka je v dvoch uint8
+# buffroch (zdielana pamat alebo memmap subory) - z jedneho sa cita, do druheho zapisuje.
+# Dlazdica cita aj okraj 1 bunky okolo seba z aktualneho buffra (halo), takze pravidlo
+# 8 susedov plati aj cez hranice dlazdic. Nahodne cisla pre dlazdicu v danom kroku su
+# z generatora odvodeneho z (seed, index dlazdice, krok), vysledok preto nezavisi od
+# poctu procesov.
+
+# otvorene buffre v procese workera, aby sa nepripajali pri kazdom kroku znova
+attached_buffers = {}
+
+def attach_buffer(buffer : tuple, shape : tuple[int, int]):
+    if buffer not in attached_buffers:
+        kind, name = buffer
+
+        if kind == "shm":
+            shared = shared_memory.SharedMemory(name=name)
+            attached_buffers[buffer] = (shared, np.ndarray(shape, dtype=np.uint8, buffer=shared.buf))
+        else:
+            attached_buffers[buffer] = (None, np.load(name, mmap_mode="r+"))
+
+    return attached_buffers[buffer][1]
+
+def tile_rng(seed : int, tile_index : int, step : int):
+    return np.random.default_rng(np.random.SeedSequence(entropy=seed, spawn_key=(tile_index, step)))
+
+def init_tile(task : tuple) -> np.ndarray:
+    buffer, shape, tile, tile_index, seed, initial_p = task
+    x, y, tile_width, tile_height = tile
+
+    grid = attach_buffer(buffer, shape)
+    random = tile_rng(seed, tile_index, 0).random((tile_height, tile_width))
+    grid[y:y + tile_height, x:x + tile_width] = np.where(random < initial_p, ForestFire.TREE, ForestFire.EMPTY)
+
+    return np.bincount(grid[y:y + tile_height, x:x + tile_width].ravel(), minlength=4)[:4]
+
+def step_tile(task : tuple) -> np.ndarray:
+    source, target, shape, tile, tile_index, seed, step, p, f = task
+    x, y, tile_width, tile_height = tile
+
+    current = attach_buffer(source, shape)
+    following = attach_buffer(target, shape)
+
+    # dlazdica aj s halo okrajom, orezana na hranice mriezky
+    top = max(y - 1, 0)
+    left = max(x - 1, 0)
+    region = np.asarray(current[top:min(y + tile_height + 1, shape[0]), left:min(x + tile_width + 1, shape[1])])
+
+    inner = (slice(y - top, y - top + tile_height), slice(x - left, x - left + tile_width))
+    fire_neighbours = fire_neighbour_mask(region)[inner]
+
+    random = tile_rng(seed, tile_index, step).random((tile_height, tile_width))
+    new_tile = next_state(region[inner], fire_neighbours, random, p, f)
+    following[y:y + tile_height, x:x + tile_width] = new_tile
+
+    return np.bincount(new_tile.ravel(), minlength=4)[:4]
+
+class TiledForestFire:
+    def __init__(self, width : int, height : int, p : float, f : float, initial_p : float, seed : int = None, tile_size : int = 1024, processes : int = None, directory : str = None) -> None:
+        self.width = width
+        self.height = height
+        self.p = p
+        self.f = f
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.steps = 0
+        self.processes = processes or os.cpu_count() or 1
+        self.shared = []
+
+        shape = (height, width)
+        if directory is None:
+            for _ in range(2):
+                self.shared.append(shared_memory.SharedMemory(create=True, size=width * height))
+            self.buffers = [("shm", shared.name) for shared in self.shared]
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.buffers = []
+            for index in range(2):
+                path = os.path.join(directory, "grid_{}.npy".format(index))
+                np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape).flush()
+                self.buffers.append(("file", path))
+
+        self.tiles = [(x, y, min(tile_size, width - x), min(tile_size, height - y))
+                      for y in range(0, height, tile_size)
+                      for x in range(0, width, tile_size)]
+
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self.counts = self.run([(self.buffers[0], shape, tile, index, self.seed, initial_p) for index, tile in enumerate(self.tiles)], init_tile)
+
+    def run(self, tasks : list, function) -> np.ndarray:
+        # vacsie davky, aby sa neposielala kazda dlazdica zvlast
+        chunksize = max(1, len(tasks) // (self.processes * 4))
+
+        return np.sum(list(self.executor.map(function, tasks, chunksize=chunksize)), axis=0)
+
+    @property
+    def grid(self):
+        return attach_buffer(self.buffers[self.steps % 2], (self.height, self.width))
+
+    # vrati pocty (prazdne, stromy, ohen, vyhorene) po kroku
+    def update(self) -> np.ndarray:
+        source = self.buffers[self.steps % 2]
+        target = self.buffers[(self.steps + 1) % 2]
+        shape = (self.height, self.width)
+
+        self.counts = self.run([(source, target, shape, tile, index, self.seed, self.steps + 1, self.p, self.f)
+                                for index, tile in enumerate(self.tiles)], step_tile)
+        self.steps += 1
+
+        return self.counts
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+        for buffer in self.buffers:
+            shared, _ = attached_buffers.pop(buffer, (None, None))
+            if shared is not None:
+                shared.close()
+
+        for shared in self.shared:
+            shared.close()
+            shared.unlink()
+        self.shared = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+if __name__ == "__main__":
+    with TiledForestFire(10000, 10000, 0.05, 0.00001, 0.5, seed=0) as forest:
+        for step in range(100):
+            print(step, forest.update())